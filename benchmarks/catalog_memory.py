@@ -0,0 +1,77 @@
+"""
+Memory / runtime comparison for the product catalog join.
+
+Builds a synthetic sales frame shaped like data/ingested/*.csv and enriches it
+two ways: the original object-dtype pd.merge, and the categorical-code join in
+scripts/product_catalog.py. Prints deep memory usage and join time as JSON.
+
+    python benchmarks/catalog_memory.py --rows 10000000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from product_catalog import PRODUCT_CATALOG, compact_dtypes, enrich_with_catalog, load_catalog  # noqa: E402
+
+# Same value domains as scripts/generate_fake_sales.py (not imported: it configures logging on import)
+REGIONS = ["North", "South", "East", "West"]
+PRODUCTS = [f"P{str(i).zfill(3)}" for i in range(1, 21)]
+
+
+def synthetic_sales(n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.Timestamp("2025-11-01") + pd.to_timedelta(rng.integers(0, 30, n_rows), unit="D"),
+        "region": np.array(REGIONS, dtype=object)[rng.integers(0, len(REGIONS), n_rows)],
+        "product_id": np.array(PRODUCTS, dtype=object)[rng.integers(0, len(PRODUCTS), n_rows)],
+        "revenue": rng.uniform(50, 3000, n_rows).round(2),
+        "cost": rng.uniform(50, 200, n_rows).round(2),
+        "quantity": rng.integers(1, 11, n_rows),
+    })
+
+
+def mb(df):
+    return round(df.memory_usage(deep=True).sum() / 1e6, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    sales = synthetic_sales(args.rows)
+    catalog_raw = pd.read_csv(PRODUCT_CATALOG, dtype=object).astype({"cost_price": "float64"})
+
+    start = time.perf_counter()
+    baseline = pd.merge(sales.astype({"region": object, "product_id": object}), catalog_raw, on="product_id", how="left")
+    baseline_secs = time.perf_counter() - start
+    baseline_mb = mb(baseline)
+    del baseline
+
+    # transform_sales reads ingested files straight into categoricals, so the
+    # cast is not part of the timed join
+    compact = compact_dtypes(sales.copy())
+    catalog = load_catalog(PRODUCT_CATALOG)
+    start = time.perf_counter()
+    enriched, unmatched_rate = enrich_with_catalog(compact, catalog)
+    compact_secs = time.perf_counter() - start
+
+    result = {
+        "rows": args.rows,
+        "baseline": {"join_secs": round(baseline_secs, 3), "memory_mb": baseline_mb},
+        "categorical": {"join_secs": round(compact_secs, 3), "memory_mb": mb(enriched)},
+        "memory_reduction_pct": round(100 * (1 - mb(enriched) / baseline_mb), 1),
+        "unmatched_sku_rate": unmatched_rate,
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
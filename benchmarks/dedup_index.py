@@ -0,0 +1,90 @@
+"""
+Scale test for the persistent dedup fingerprint index (scripts/dedup.py).
+
+Grows an index in a temp dir to --total fingerprints in --batch sized
+ingests, then times lookups of a batch that is half historical, half new.
+Reports insert/lookup timings, run count, on-disk size and peak RSS as JSON.
+
+    python benchmarks/dedup_index.py --total 300000000 --batch 5000000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from dedup import FingerprintIndex  # noqa: E402
+
+
+def peak_rss_mb():
+    # Includes file-backed pages of the memory-mapped runs, which the OS can reclaim
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def anon_rss_mb():
+    """Resident anonymous (heap) memory, Linux only; None elsewhere."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--total", type=int, default=50_000_000)
+    parser.add_argument("--batch", type=int, default=1_000_000)
+    parser.add_argument("--lookup", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        index = FingerprintIndex(workdir)
+        insert_secs, last_batch = [], None
+        for _ in range(0, args.total, args.batch):
+            last_batch = rng.integers(0, 2**64, args.batch, dtype=np.uint64)
+            start = time.perf_counter()
+            index.add(last_batch)
+            insert_secs.append(time.perf_counter() - start)
+
+        rss_after_build = peak_rss_mb()
+        half = args.lookup // 2
+        probes = np.concatenate([
+            rng.choice(last_batch, half, replace=False),
+            rng.integers(0, 2**64, args.lookup - half, dtype=np.uint64),
+        ])
+        reopened = FingerprintIndex(workdir)
+        start = time.perf_counter()
+        hits = reopened.contains(probes)
+        lookup_secs = time.perf_counter() - start
+
+        disk_bytes = sum(os.path.getsize(os.path.join(workdir, r)) for r in reopened.runs)
+        result = {
+            "fingerprints": len(reopened),
+            "runs": len(reopened.runs),
+            "disk_mb": round(disk_bytes / 1e6, 1),
+            "insert_secs": {"total": round(sum(insert_secs), 2), "max_batch": round(max(insert_secs), 2)},
+            "lookup": {
+                "probes": args.lookup,
+                "secs": round(lookup_secs, 3),
+                "probes_per_sec": round(args.lookup / lookup_secs),
+                "hit_rate": round(float(hits.mean()), 4),
+            },
+            "peak_rss_mb": {"after_build": rss_after_build, "after_lookup": peak_rss_mb()},
+            "anon_rss_mb": anon_rss_mb(),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+HTTP load test for the analytics API (scripts/api_server.py).
+
+Builds a synthetic warehouse of --rows aggregated rows in a temp dir, starts
+the FastAPI app under uvicorn in a subprocess pointed at it, then drives
+--concurrency keep-alive connections from an asyncio client for --duration
+seconds over a weighted endpoint mix. Prints throughput, latency percentiles
+and error rates as JSON (optionally also to --output) so runs can be
+compared across commits.
+
+    python benchmarks/load_test.py --rows 1000000 --concurrency 32 --duration 30 \\
+        --mix revenue=4,top-products=4,distinct-skus=1,basket-percentiles=1,health=1
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import sqlite3
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from sketches import build_partition_sketches, save_sketches  # noqa: E402
+from query_engines import synthetic_aggregated  # noqa: E402
+
+ENDPOINTS = {
+    "health": "/health",
+    "revenue": "/kpi/revenue",
+    "top-products": "/kpi/top-products?limit=10",
+    "distinct-skus": "/kpi/distinct-skus",
+    "basket-percentiles": "/kpi/basket-percentiles",
+}
+DEFAULT_MIX = "revenue=4,top-products=4,distinct-skus=1,basket-percentiles=1,health=1"
+
+
+# --------------------------
+# Fixtures
+# --------------------------
+def build_warehouse(workdir, n_rows, n_sketch_rows=200_000):
+    """Write sales_aggregated (SQLite + CSV) and a sketch table for a synthetic history."""
+    processed_dir = os.path.join(workdir, "processed")
+    os.makedirs(processed_dir)
+    db_path = os.path.join(workdir, "retail_sales.db")
+
+    aggregated = synthetic_aggregated(n_rows)
+    aggregated.to_csv(os.path.join(processed_dir, "sales_aggregated.csv"), index=False)
+    conn = sqlite3.connect(db_path)
+    aggregated.to_sql("sales_aggregated", conn, index=False, chunksize=500_000)
+    conn.execute("CREATE INDEX idx_sales_aggr_date ON sales_aggregated(date);")
+    conn.commit()
+    conn.close()
+
+    # Basket-level sample drawn from the aggregated rows for the sketch endpoints
+    sample = aggregated.sample(min(n_sketch_rows, n_rows), random_state=0)
+    save_sketches(build_partition_sketches(sample), db_path)
+    return db_path, processed_dir
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, db_path, processed_dir, engine, workers):
+    env = dict(os.environ, RETAIL_DB_PATH=db_path, RETAIL_PROCESSED_DIR=processed_dir, QUERY_ENGINE=engine)
+    cmd = [sys.executable, "-m", "uvicorn", "scripts.api_server:app",
+           "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=BASE_DIR, env=env)
+
+
+# --------------------------
+# Minimal asyncio HTTP/1.1 client (keep-alive, Content-Length bodies)
+# --------------------------
+class Connection:
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def get(self, path):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        request = f"GET {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nConnection: keep-alive\r\n\r\n"
+        self.writer.write(request.encode())
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+        length, close = 0, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "connection" and value.strip().lower() == "close":
+                close = True
+        await self.reader.readexactly(length)
+        if close:
+            await self.close()
+        return status
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+        self.reader = self.writer = None
+
+
+async def wait_until_ready(port, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        conn = Connection("127.0.0.1", port)
+        try:
+            if await conn.get("/health") == 200:
+                return
+        except OSError:
+            pass
+        finally:
+            await conn.close()
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"API did not become ready on port {port} within {timeout:.0f}s")
+
+
+async def worker(port, names, weights, stop_at, record_from, samples, seed):
+    rng = random.Random(seed)
+    conn = Connection("127.0.0.1", port)
+    try:
+        while time.monotonic() < stop_at:
+            name = rng.choices(names, weights)[0]
+            start = time.monotonic()
+            try:
+                status = await conn.get(ENDPOINTS[name])
+            except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+                status = 0  # transport error
+                await conn.close()
+            if start >= record_from:
+                samples.append((name, status, time.monotonic() - start))
+    finally:
+        await conn.close()
+
+
+async def drive(port, mix, concurrency, duration, warmup, seed):
+    names, weights = list(mix), list(mix.values())
+    samples = []
+    record_from = time.monotonic() + warmup
+    stop_at = record_from + duration
+    await asyncio.gather(*(
+        worker(port, names, weights, stop_at, record_from, samples, seed + i) for i in range(concurrency)
+    ))
+    return samples
+
+
+# --------------------------
+# Reporting
+# --------------------------
+def summarize(samples, duration):
+    df = pd.DataFrame(samples, columns=["endpoint", "status", "latency"])
+
+    def stats(frame):
+        ok = frame["status"] == 200
+        latency_ms = frame["latency"].to_numpy() * 1000
+        return {
+            "requests": int(len(frame)),
+            "throughput_rps": round(len(frame) / duration, 2),
+            "error_rate": round(float((~ok).mean()), 5) if len(frame) else 0.0,
+            "errors_by_status": {str(k): int(v) for k, v in frame.loc[~ok, "status"].value_counts().items()},
+            "latency_ms": {
+                "mean": round(float(latency_ms.mean()), 2),
+                "p50": round(float(np.percentile(latency_ms, 50)), 2),
+                "p95": round(float(np.percentile(latency_ms, 95)), 2),
+                "p99": round(float(np.percentile(latency_ms, 99)), 2),
+                "max": round(float(latency_ms.max()), 2),
+            } if len(frame) else {},
+        }
+
+    report = stats(df)
+    report["endpoints"] = {name: stats(group) for name, group in df.groupby("endpoint")}
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def parse_mix(spec):
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint '{name}' in --mix, expected one of {sorted(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000, help="rows in the synthetic sales_aggregated table")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight,... over " + ",".join(ENDPOINTS))
+    parser.add_argument("--engine", default="sqlite", choices=["sqlite", "duckdb"])
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        build_start = time.perf_counter()
+        db_path, processed_dir = build_warehouse(workdir, args.rows)
+        build_secs = time.perf_counter() - build_start
+
+        port = free_port()
+        server = start_server(port, db_path, processed_dir, args.engine, args.server_workers)
+        try:
+            asyncio.run(wait_until_ready(port))
+            samples = asyncio.run(drive(port, mix, args.concurrency, args.duration, args.warmup, args.seed))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    report = {
+        "commit": git_commit(),
+        "config": {
+            "rows": args.rows,
+            "concurrency": args.concurrency,
+            "duration_secs": args.duration,
+            "warmup_secs": args.warmup,
+            "mix": mix,
+            "engine": args.engine,
+            "server_workers": args.server_workers,
+        },
+        "fixture_build_secs": round(build_secs, 2),
+        **summarize(samples, args.duration),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
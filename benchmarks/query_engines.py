@@ -0,0 +1,135 @@
+"""
+KPI query latency per query engine (scripts/query_engine.py).
+
+Writes a synthetic sales_aggregated table of --rows rows to a temporary
+processed dir (CSV, read by DuckDB) and SQLite database (indexed like
+load_to_db.py), then times the API/dashboard KPI queries on each backend.
+Prints median / min latency in milliseconds as JSON.
+
+    python benchmarks/query_engines.py --rows 10000000
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+import statistics
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from query_engine import ENGINES, DuckDBEngine, SQLiteEngine  # noqa: E402
+
+REGIONS = ["North", "South", "East", "West"]
+
+KPI_QUERIES = {
+    "overall": """
+        SELECT ROUND(SUM(revenue),2) AS total_revenue,
+               ROUND(SUM(profit),2) AS total_profit,
+               ROUND(AVG(margin_percent),2) AS avg_margin
+        FROM sales_aggregated;
+    """,
+    "revenue_by_region": """
+        SELECT region,
+               ROUND(SUM(revenue),2) AS total_revenue,
+               ROUND(SUM(profit),2) AS total_profit,
+               ROUND(AVG(margin_percent),2) AS avg_margin
+        FROM sales_aggregated
+        GROUP BY region
+        ORDER BY total_revenue DESC;
+    """,
+    "top_products": """
+        SELECT product_id,
+               ROUND(SUM(revenue),2) AS total_revenue,
+               ROUND(SUM(profit),2) AS total_profit,
+               ROUND(AVG(margin_percent),2) AS avg_margin
+        FROM sales_aggregated
+        GROUP BY product_id
+        ORDER BY total_revenue DESC
+        LIMIT 10;
+    """,
+    "daily_trend": """
+        SELECT date, SUM(revenue) AS revenue
+        FROM sales_aggregated
+        GROUP BY date
+        ORDER BY date;
+    """,
+}
+
+
+def synthetic_aggregated(n_rows, n_products=2000, n_days=730, seed=7):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=n_days, freq="D").strftime("%Y-%m-%d")
+    products = np.array([f"P{i:05d}" for i in range(1, n_products + 1)], dtype=object)
+    revenue = rng.uniform(50, 3000, n_rows).round(2)
+    total_cost = (revenue / rng.uniform(1.1, 1.5, n_rows)).round(2)
+    profit = revenue - total_cost
+    return pd.DataFrame({
+        "date": np.asarray(dates, dtype=object)[rng.integers(0, n_days, n_rows)],
+        "region": np.array(REGIONS, dtype=object)[rng.integers(0, len(REGIONS), n_rows)],
+        "product_id": products[rng.integers(0, n_products, n_rows)],
+        "revenue": revenue,
+        "total_cost": total_cost,
+        "profit": profit,
+        "margin_percent": (profit / revenue * 100).round(2),
+        "quantity": rng.integers(1, 11, n_rows),
+    })
+
+
+def build_fixtures(df, workdir):
+    processed_dir = os.path.join(workdir, "processed")
+    os.makedirs(processed_dir)
+    df.to_csv(os.path.join(processed_dir, "sales_aggregated.csv"), index=False)
+
+    db_path = os.path.join(workdir, "retail_sales.db")
+    conn = sqlite3.connect(db_path)
+    df.to_sql("sales_aggregated", conn, index=False, chunksize=500_000)
+    conn.execute("CREATE INDEX idx_sales_aggr_date ON sales_aggregated(date);")
+    conn.commit()
+    conn.close()
+    return processed_dir, db_path
+
+
+def time_query(engine, sql, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        engine.query(sql)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(timings), 2), "min_ms": round(min(timings), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--engines", default=",".join(ENGINES))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        processed_dir, db_path = build_fixtures(synthetic_aggregated(args.rows), workdir)
+        factories = {
+            "sqlite": lambda: SQLiteEngine(db_path),
+            "duckdb": lambda: DuckDBEngine(processed_dir, tables=["sales_aggregated"]),
+        }
+
+        results = {"rows": args.rows, "repeats": args.repeats, "engines": {}}
+        for name in args.engines.split(","):
+            engine = factories[name]()
+            start = time.perf_counter()
+            engine.query("SELECT COUNT(*) FROM sales_aggregated")  # first touch: DuckDB loads the CSV here
+            warmup_ms = round((time.perf_counter() - start) * 1000, 2)
+            results["engines"][name] = {
+                "warmup_ms": warmup_ms,
+                "queries": {q: time_query(engine, sql, args.repeats) for q, sql in KPI_QUERIES.items()},
+            }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
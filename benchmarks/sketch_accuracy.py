@@ -0,0 +1,83 @@
+"""
+Accuracy check for scripts/sketches.py against exact answers.
+
+Builds per date x region sketches over a synthetic transactional frame, merges
+them across the full date range (as the /kpi/distinct-skus and
+/kpi/basket-percentiles endpoints do) and compares with exact pandas results.
+Prints the observed errors as JSON and exits non-zero if any exceeds its bound.
+
+    python benchmarks/sketch_accuracy.py --rows 2000000 --skus 50000
+"""
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from sketches import build_partition_sketches, merge_sketches  # noqa: E402
+
+REGIONS = ["North", "South", "East", "West"]
+
+# Bounds: ~4 standard errors for HLL (p=12), rank error for t-digest
+MAX_DISTINCT_REL_ERROR = 0.065
+MAX_QUANTILE_RANK_ERROR = 0.005
+
+
+def synthetic_transactions(n_rows, n_skus, n_days=30, seed=3):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": (pd.Timestamp("2025-11-01") + pd.to_timedelta(rng.integers(0, n_days, n_rows), unit="D")),
+        "region": np.array(REGIONS, dtype=object)[rng.integers(0, len(REGIONS), n_rows)],
+        "product_id": pd.Series(rng.zipf(1.3, n_rows) % n_skus).map("P{:06d}".format),
+        "revenue": rng.lognormal(6, 0.8, n_rows).round(2),
+        "quantity": rng.integers(1, 11, n_rows),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--skus", type=int, default=50_000)
+    args = parser.parse_args()
+
+    df = synthetic_transactions(args.rows, args.skus)
+    sketch_df = build_partition_sketches(df)
+
+    report, failures = {"rows": args.rows, "regions": {}}, []
+    for region, region_df in df.groupby("region"):
+        parts = sketch_df[sketch_df["region"] == region]
+        hll = merge_sketches("hll", parts.loc[parts["metric"] == "distinct_skus", "sketch"])
+        exact = region_df["product_id"].nunique()
+        stats = {"distinct_exact": exact, "distinct_estimate": round(hll.estimate()),
+                 "distinct_rel_error": round(abs(hll.estimate() / exact - 1), 5)}
+        if stats["distinct_rel_error"] > MAX_DISTINCT_REL_ERROR:
+            failures.append(f"{region} distinct_skus")
+
+        for metric, column in [("basket_revenue", "revenue"), ("basket_quantity", "quantity")]:
+            digest = merge_sketches("tdigest", parts.loc[parts["metric"] == metric, "sketch"])
+            values = np.sort(region_df[column].to_numpy(dtype=np.float64))
+            for q in (0.5, 0.95):
+                estimate = digest.quantile(q)
+                # Integer columns: the digest interpolates between atoms, judge the nearest one
+                probe = np.round(estimate) if column == "quantity" else estimate
+                # Rank error: how far the estimate's position is from q (robust to ties)
+                lo = np.searchsorted(values, probe, side="left") / values.size
+                hi = np.searchsorted(values, probe, side="right") / values.size
+                rank_error = 0.0 if lo <= q <= hi else min(abs(lo - q), abs(hi - q))
+                stats[f"{column}_p{int(q * 100)}"] = round(estimate, 2)
+                stats[f"{column}_p{int(q * 100)}_rank_error"] = round(rank_error, 5)
+                if rank_error > MAX_QUANTILE_RANK_ERROR:
+                    failures.append(f"{region} {column} p{int(q * 100)}")
+        report["regions"][region] = stats
+
+    report["failures"] = failures
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,16 @@
-import sqlite3
 import pandas as pd
 import streamlit as st
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, "db", "retail_sales.db")
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+from query_engine import get_engine
 
 @st.cache_data
 def load_data(query):
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    # Routed to SQLite or DuckDB depending on the QUERY_ENGINE env var
+    return get_engine().query(query)
 
 st.set_page_config(page_title="Retail Sales Dashboard", layout="wide")
 
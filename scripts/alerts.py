@@ -1,16 +1,18 @@
+import os
+import time
+import queue
+import atexit
 import logging
 import smtplib
+import threading
 from email.mime.text import MIMEText
+
 import requests
+from dotenv import load_dotenv
 
 # --- Configuration ---
 ALERT_MODE = "slack"  # choose "slack" or "email"
 
-from dotenv import load_dotenv
-import os
-import requests
-import logging
-
 load_dotenv()
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
 EMAIL_CONFIG = {
@@ -22,26 +24,226 @@ EMAIL_CONFIG = {
     "smtp_pass": "YOUR_APP_PASSWORD"  # use an App Password, not your actual one
 }
 
-def send_alert(subject: str, message: str):
-    try:
-        if ALERT_MODE == "slack":
+# --- Dispatcher tuning ---
+QUEUE_MAXSIZE = 100          # alerts beyond this are dropped, never block the pipeline
+REQUEST_TIMEOUT = 5          # seconds, per webhook POST / SMTP operation
+MAX_RETRIES = 3              # delivery attempts after the first one
+BACKOFF_BASE = 1.0           # seconds, doubled on every retry
+DEDUP_WINDOW = 600           # seconds an identical subject is suppressed for
+BATCH_WINDOW = 2.0           # seconds to wait for more alerts before sending a digest
+MAX_BATCH_SIZE = 20
+
+
+class AlertDispatcher:
+    """
+    Background alert sender.
+
+    send() only enqueues, so callers never wait on the network. A worker
+    thread drains the queue, drops subjects already sent within the dedup
+    window, folds whatever arrived within the batch window into one digest
+    and delivers it with exponential-backoff retry over a reused HTTP
+    session or SMTP connection.
+    """
+
+    def __init__(self, mode=ALERT_MODE, webhook_url=None, email_config=None,
+                 maxsize=QUEUE_MAXSIZE, timeout=REQUEST_TIMEOUT, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, dedup_window=DEDUP_WINDOW,
+                 batch_window=BATCH_WINDOW, max_batch_size=MAX_BATCH_SIZE):
+        self.mode = mode
+        self.webhook_url = webhook_url or SLACK_WEBHOOK_URL
+        self.email_config = email_config or EMAIL_CONFIG
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.dedup_window = dedup_window
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._last_sent = {}  # subject -> monotonic time of last delivery
+        self._session = None
+        self._smtp = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.sent = 0
+        self.dropped = 0
+        self.suppressed = 0
+        self.failed = 0
+
+    # --------------------------
+    # Public API
+    # --------------------------
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+                self._thread.start()
+        return self
+
+    def send(self, subject: str, message: str) -> bool:
+        """Enqueue an alert. Returns False if the queue is full and the alert was dropped."""
+        self.start()
+        try:
+            self._queue.put_nowait((subject, message))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logging.error(f"Alert queue full, dropped alert: {subject}")
+            return False
+
+    def flush(self, timeout: float = None):
+        """Block until every queued alert has been delivered or given up on."""
+        if self._thread is None:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                logging.warning("Alert flush timed out with alerts still pending.")
+                return
+            time.sleep(0.05)
+
+    def shutdown(self, timeout: float = 10.0):
+        self.flush(timeout)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._close_connections()
+
+    # --------------------------
+    # Worker
+    # --------------------------
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                alerts = self._dedupe(batch)
+                if alerts:
+                    subject, message = self._digest(alerts)
+                    self._deliver_with_retry(subject, message, [s for s, _ in alerts])
+            except Exception as e:
+                logging.error(f"Alert dispatcher error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _dedupe(self, batch):
+        now = time.monotonic()
+        alerts, seen = [], set()
+        for subject, message in batch:
+            last = self._last_sent.get(subject)
+            if subject in seen or (last is not None and now - last < self.dedup_window):
+                self.suppressed += 1
+                logging.info(f"Suppressed duplicate alert: {subject}")
+                continue
+            seen.add(subject)
+            alerts.append((subject, message))
+        return alerts
+
+    @staticmethod
+    def _digest(alerts):
+        if len(alerts) == 1:
+            return alerts[0]
+        subject = f"{len(alerts)} pipeline alerts: " + "; ".join(s for s, _ in alerts)
+        message = "\n\n".join(f"[{i}] {s}\n{m}" for i, (s, m) in enumerate(alerts, 1))
+        return subject, message
+
+    def _deliver_with_retry(self, subject, message, subjects):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._deliver(subject, message)
+                now = time.monotonic()
+                for s in subjects:
+                    self._last_sent[s] = now
+                self.sent += 1
+                return True
+            except Exception as e:
+                # A broken connection is not worth reusing on the next attempt
+                self._close_connections()
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    logging.error(f"Alert delivery failed after {attempt + 1} attempts: {e}")
+                    return False
+                delay = self.backoff_base * (2 ** attempt)
+                logging.warning(f"Alert delivery failed ({e}), retrying in {delay:.1f}s")
+                if self._stop.wait(delay):
+                    return False
+
+    # --------------------------
+    # Transports
+    # --------------------------
+    def _deliver(self, subject, message):
+        if self.mode == "slack":
+            if self._session is None:
+                self._session = requests.Session()
             payload = {"text": f":rotating_light: *{subject}*\n{message}"}
-            resp = requests.post(SLACK_WEBHOOK_URL, json=payload)
+            resp = self._session.post(self.webhook_url, json=payload, timeout=self.timeout)
             if resp.status_code != 200:
-                raise Exception(f"Slack webhook failed: {resp.text}")
+                raise Exception(f"Slack webhook failed: {resp.status_code} {resp.text}")
             logging.info("Slack alert sent successfully.")
 
-        elif ALERT_MODE == "email":
+        elif self.mode == "email":
+            cfg = self.email_config
             msg = MIMEText(message)
             msg["Subject"] = subject
-            msg["From"] = EMAIL_CONFIG["from"]
-            msg["To"] = EMAIL_CONFIG["to"]
+            msg["From"] = cfg["from"]
+            msg["To"] = cfg["to"]
 
-            with smtplib.SMTP(EMAIL_CONFIG["smtp_server"], EMAIL_CONFIG["smtp_port"]) as server:
-                server.starttls()
-                server.login(EMAIL_CONFIG["smtp_user"], EMAIL_CONFIG["smtp_pass"])
-                server.send_message(msg)
+            if self._smtp is None:
+                self._smtp = smtplib.SMTP(cfg["smtp_server"], cfg["smtp_port"], timeout=self.timeout)
+                self._smtp.starttls()
+                self._smtp.login(cfg["smtp_user"], cfg["smtp_pass"])
+            self._smtp.send_message(msg)
             logging.info("Email alert sent successfully.")
 
+        else:
+            raise ValueError(f"Unknown alert mode: {self.mode}")
+
+    def _close_connections(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> AlertDispatcher:
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = AlertDispatcher()
+            atexit.register(_dispatcher.shutdown)
+        return _dispatcher
+
+
+def send_alert(subject: str, message: str):
+    """Queue an alert for background delivery; never blocks or raises."""
+    try:
+        get_dispatcher().send(subject, message)
     except Exception as e:
         logging.error(f"Alert delivery failed: {e}")
@@ -1,16 +1,19 @@
-from fastapi import FastAPI, HTTPException
-import sqlite3
 import pandas as pd
+from fastapi import FastAPI, HTTPException
+
+try:
+    from scripts.query_engine import get_engine
+    from scripts.sketches import SKETCH_TABLE, merge_sketches
+except ImportError:
+    from query_engine import get_engine
+    from sketches import SKETCH_TABLE, merge_sketches
 
-DB_PATH = "db/retail_sales.db"
 app = FastAPI(title="Retail Sales Analytics API")
 
-def query_db(query, params=None):
+def query_db(query, params=None, engine=None):
+    """Run an analytical query on `engine`, or the configured QUERY_ENGINE (default sqlite)."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        df = pd.read_sql_query(query, conn, params=params or [])
-        conn.close()
-        return df
+        return get_engine(engine).query(query, params)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -46,3 +49,57 @@ def top_products(limit: int = 5):
     """
     df = query_db(query, [limit])
     return df.to_dict(orient="records")
+
+def load_sketches(metrics, start_date=None, end_date=None):
+    """Fetch per date × region sketch blobs for `metrics` within an optional date range."""
+    conditions = [f"metric IN ({', '.join('?' for _ in metrics)})"]
+    params = list(metrics)
+    if start_date:
+        conditions.append("date >= ?")
+        params.append(start_date)
+    if end_date:
+        conditions.append("date <= ?")
+        params.append(end_date)
+    columns = ["date", "region", "metric", "kind", "n_rows", "sketch"]
+    # Warehouses built before the sketch table existed have no sketches yet
+    exists = query_db(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", [SKETCH_TABLE], engine="sqlite"
+    )
+    if exists.empty:
+        return pd.DataFrame(columns=columns)
+    query = f"""
+        SELECT {', '.join(columns)}
+        FROM {SKETCH_TABLE}
+        WHERE {' AND '.join(conditions)}
+        ORDER BY region, date;
+    """
+    # Sketch blobs only live in the SQLite warehouse
+    return query_db(query, params, engine="sqlite")
+
+@app.get("/kpi/distinct-skus")
+def distinct_skus(start_date: str = None, end_date: str = None, per_day: bool = False):
+    """Approximate distinct SKUs per region (HyperLogLog, ~1.6% std. error), merged over the date range."""
+    df = load_sketches(["distinct_skus"], start_date, end_date)
+    keys = ["region", "date"] if per_day else ["region"]
+    results = []
+    for key, group in df.groupby(keys, sort=True):
+        key = key if isinstance(key, tuple) else (key,)
+        sketch = merge_sketches("hll", group["sketch"])
+        results.append({**dict(zip(keys, key)), "distinct_skus": round(sketch.estimate())})
+    return results
+
+@app.get("/kpi/basket-percentiles")
+def basket_percentiles(start_date: str = None, end_date: str = None):
+    """Approximate p50/p95 basket revenue and quantity per region (t-digest), merged over the date range."""
+    df = load_sketches(["basket_revenue", "basket_quantity"], start_date, end_date)
+    results = []
+    for region, group in df.groupby("region", sort=True):
+        row = {"region": region}
+        for metric, metric_rows in group.groupby("metric"):
+            sketch = merge_sketches("tdigest", metric_rows["sketch"])
+            name = metric.removeprefix("basket_")
+            row[f"{name}_p50"] = round(sketch.quantile(0.50), 2)
+            row[f"{name}_p95"] = round(sketch.quantile(0.95), 2)
+        row["baskets"] = int(group.loc[group["metric"] == "basket_revenue", "n_rows"].sum())
+        results.append(row)
+    return results
@@ -0,0 +1,202 @@
+"""
+Cross-file row deduplication backed by a persistent fingerprint index.
+
+Every ingested row is reduced to a 64-bit fingerprint (hash_pandas_object
+over the business columns). Fingerprints of rows already ingested live on
+disk as sorted, disjoint uint64 runs (.npy files) listed in manifest.json.
+Lookups memory-map each run and binary-search it, so resident memory stays
+bounded by the pages touched rather than the size of the history. New
+fingerprints are appended as a new run, and runs of similar size are merged
+in fixed-size chunks, keeping roughly log(N) runs (8 bytes per
+historical row on disk).
+
+Rows repeated *within* one file are kept: only rows seen in an earlier
+file are treated as duplicates.
+"""
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INDEX_DIR = os.path.join(BASE_DIR, "data", "dedup_index")
+DEDUP_COLUMNS = ["date", "region", "product_id", "revenue", "cost", "quantity"]
+
+TIER_RATIO = 4          # merge the newest two runs while the older is at most 4x the newer
+MAX_RUNS = 16           # hard cap on the number of runs probed per lookup
+MERGE_CHUNK = 1 << 20   # keys per run per merge step, bounds merge memory
+
+
+def row_fingerprints(df: pd.DataFrame, columns=DEDUP_COLUMNS) -> np.ndarray:
+    """
+    Vectorized uint64 fingerprint of each row over `columns`.
+
+    Columns are first normalized (dates to datetime64, numbers to float64,
+    text to strings) so the same transaction hashes identically whether it
+    comes from a freshly validated frame or a re-read CSV.
+    """
+    canonical = {}
+    for col in columns:
+        values = df[col] if col in df.columns else pd.Series(pd.NA, index=df.index)
+        if col == "date":
+            canonical[col] = pd.to_datetime(values, errors="coerce").astype("datetime64[ns]")
+        elif col in ("revenue", "cost", "quantity"):
+            canonical[col] = pd.to_numeric(values, errors="coerce").astype("float64")
+        else:
+            canonical[col] = values.astype("string").fillna("")
+    return pd.util.hash_pandas_object(pd.DataFrame(canonical), index=False).to_numpy(dtype=np.uint64)
+
+
+class FingerprintIndex:
+    def __init__(self, index_dir: str = INDEX_DIR):
+        self.index_dir = index_dir
+        self.manifest_path = os.path.join(index_dir, "manifest.json")
+        os.makedirs(index_dir, exist_ok=True)
+        self.exists = os.path.exists(self.manifest_path)
+        if self.exists:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        else:
+            manifest = {"next_id": 0, "runs": []}
+        self.next_id = manifest["next_id"]
+        self.runs = manifest["runs"]  # file names, oldest first
+
+    def __len__(self):
+        return sum(len(self._open(run)) for run in self.runs)
+
+    # --------------------------
+    # Lookup
+    # --------------------------
+    def _open(self, run):
+        return np.load(os.path.join(self.index_dir, run), mmap_mode="r")
+
+    def contains(self, fingerprints: np.ndarray) -> np.ndarray:
+        """Boolean mask: True where the fingerprint is already in the index."""
+        fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+        # Sorted probes walk each memory-mapped run front to back
+        order = np.argsort(fingerprints, kind="stable")
+        probes = fingerprints[order]
+        found = np.zeros(len(probes), dtype=bool)
+        for run in self.runs:
+            keys = self._open(run)
+            if len(keys) == 0:
+                continue
+            in_range = (probes >= keys[0]) & (probes <= keys[-1]) & ~found
+            if not in_range.any():
+                continue
+            candidates = probes[in_range]
+            pos = np.searchsorted(keys, candidates)
+            pos[pos == len(keys)] = len(keys) - 1
+            found[np.flatnonzero(in_range)] |= np.asarray(keys[pos]) == candidates
+        mask = np.empty_like(found)
+        mask[order] = found
+        return mask
+
+    # --------------------------
+    # Updates
+    # --------------------------
+    def add(self, fingerprints: np.ndarray):
+        """Add fingerprints not already present as a new sorted run, then compact."""
+        fingerprints = np.unique(np.asarray(fingerprints, dtype=np.uint64))
+        fingerprints = fingerprints[~self.contains(fingerprints)]
+        if len(fingerprints) == 0:
+            return 0
+        self.runs.append(self._write_run(fingerprints))
+        # Publishing the manifest commits the new run; compaction only reorganises
+        # committed keys, so a failure there must not fail the add
+        self._save_manifest()
+        try:
+            self._compact()
+        except Exception as e:
+            logging.warning(f"Dedup index compaction failed, retried on the next add: {e}")
+        return len(fingerprints)
+
+    def _new_run_name(self):
+        name = f"run_{self.next_id:08d}.npy"
+        self.next_id += 1
+        return name
+
+    def _write_run(self, keys):
+        name = self._new_run_name()
+        tmp = os.path.join(self.index_dir, name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, keys)
+        os.replace(tmp, os.path.join(self.index_dir, name))
+        return name
+
+    def _merge_runs(self, older, newer):
+        """Merge two disjoint sorted runs chunk by chunk into a new memory-mapped run."""
+        a, b = self._open(older), self._open(newer)
+        name = self._new_run_name()
+        tmp = os.path.join(self.index_dir, name + ".tmp")
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.uint64, shape=(len(a) + len(b),))
+
+        # Split points sampled from both runs keep each step's slices <= MERGE_CHUNK keys per run
+        pivots = np.unique(np.concatenate([a[MERGE_CHUNK::MERGE_CHUNK], b[MERGE_CHUNK::MERGE_CHUNK]]))
+        a_bounds = np.r_[0, np.searchsorted(a, pivots), len(a)]
+        b_bounds = np.r_[0, np.searchsorted(b, pivots), len(b)]
+        written = 0
+        for i in range(len(a_bounds) - 1):
+            chunk = np.concatenate([a[a_bounds[i]:a_bounds[i + 1]], b[b_bounds[i]:b_bounds[i + 1]]])
+            chunk.sort()
+            out[written:written + len(chunk)] = chunk
+            written += len(chunk)
+        out.flush()
+        del out
+        os.replace(tmp, os.path.join(self.index_dir, name))
+        return name
+
+    def _compact(self):
+        while len(self.runs) > 1:
+            older, newer = self.runs[-2], self.runs[-1]
+            if len(self.runs) <= MAX_RUNS and len(self._open(older)) > TIER_RATIO * len(self._open(newer)):
+                break
+            merged = self._merge_runs(older, newer)
+            self.runs[-2:] = [merged]
+            # Publish the new run list before deleting the inputs
+            self._save_manifest()
+            for run in (older, newer):
+                os.remove(os.path.join(self.index_dir, run))
+
+    def _save_manifest(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"next_id": self.next_id, "runs": self.runs}, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+        self.exists = True
+
+
+def drop_seen_rows(df: pd.DataFrame, index: FingerprintIndex):
+    """
+    Split df into rows not seen in any earlier file and their fingerprints.
+
+    The caller adds the returned fingerprints to the index once the file has
+    been persisted, so a failed ingest leaves the index untouched.
+    """
+    fingerprints = row_fingerprints(df)
+    seen = index.contains(fingerprints)
+    return df.loc[~seen].reset_index(drop=True), fingerprints[~seen], int(seen.sum())
+
+
+def seed_from_files(index: FingerprintIndex, paths):
+    """Index rows of already-ingested files (used once when the index is first created)."""
+    added = 0
+    for path in paths:
+        added += index.add(row_fingerprints(pd.read_csv(path)))
+    # An empty history still marks the index as initialised
+    index._save_manifest()
+    logging.info(f"Dedup index seeded from {len(paths)} files ({added} fingerprints)")
+    return added
+
+
+if __name__ == "__main__":
+    # Rebuild the index from data/ingested/
+    ingested_dir = os.path.join(BASE_DIR, "data", "ingested")
+    paths = sorted(os.path.join(ingested_dir, f) for f in os.listdir(ingested_dir) if f.endswith(".csv"))
+    if os.path.isdir(INDEX_DIR):
+        for name in os.listdir(INDEX_DIR):
+            os.remove(os.path.join(INDEX_DIR, name))
+    added = seed_from_files(FingerprintIndex(INDEX_DIR), paths)
+    print(f"Indexed {added} fingerprints from {len(paths)} files -> {INDEX_DIR}")
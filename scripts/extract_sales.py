@@ -3,6 +3,7 @@ import json
 import pandas as pd
 import logging
 from datetime import datetime
+from dedup import INDEX_DIR, FingerprintIndex, drop_seen_rows, seed_from_files
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -53,10 +54,21 @@ def validate_schema(df, schema):
 
     return df
 
+def load_dedup_index():
+    index = FingerprintIndex(INDEX_DIR)
+    if not index.exists:
+        # First run with dedup enabled: index whatever was ingested before it
+        ingested = sorted(
+            os.path.join(INGESTED_DIR, f) for f in os.listdir(INGESTED_DIR) if f.endswith(".csv")
+        )
+        seed_from_files(index, ingested)
+    return index
+
 def ingest_sales_files():
     schema = load_schema()
+    index = load_dedup_index()
 
-    for file in os.listdir(RAW_DIR):
+    for file in sorted(os.listdir(RAW_DIR)):
         if not file.endswith(".csv"):
             continue
         src = os.path.join(RAW_DIR, file)
@@ -69,9 +81,21 @@ def ingest_sales_files():
         try:
             df = pd.read_csv(src)
             df = validate_schema(df, schema)
+            df, new_fingerprints, duplicates = drop_seen_rows(df, index)
+            if duplicates:
+                logging.warning(f"Dropped {duplicates} rows of {file} already ingested from earlier files")
+            if df.empty:
+                # Still written (header only) so the export is not re-read next run
+                logging.warning(f"All rows of {file} were already ingested")
             df.to_csv(dst, index=False)
+            # Only record fingerprints once the file is safely written
+            index.add(new_fingerprints)
             logging.info(f"Ingested: {file} ({len(df)} rows)")
         except Exception as e:
+            # A file left behind would be skipped next run with its rows never
+            # indexed, so remove it and retry the export from scratch
+            if os.path.exists(dst):
+                os.remove(dst)
             logging.error(f"Error processing {file}: {e}")
 
 if __name__ == "__main__":
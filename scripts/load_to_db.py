@@ -1,14 +1,20 @@
 import os
+import json
 import sqlite3
 import pandas as pd
 import logging
 from datetime import datetime
+from product_catalog import CATEGORICAL_COLUMNS
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 DB_PATH = os.path.join(BASE_DIR, "db", "retail_sales.db")
 PROCESSED_DIR = os.path.join(BASE_DIR, "data", "processed")
 LOG_FILE = os.path.join(BASE_DIR, "logs", "load_to_db.log")
+# Written by transform_sales.py: where its last run's rows start in sales_transactional.csv
+BATCH_FILE = "last_batch.json"
+
+CHUNK_ROWS = 500_000  # rows per read/insert step on a full reload
 
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
@@ -19,10 +25,61 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(message)s"
 )
 
+# Only columns present in the file are cast; pandas ignores the rest
+DTYPES = {col: "category" for col in CATEGORICAL_COLUMNS}
+
 def load_csv_to_sqlite(csv_path, table_name, conn):
-    df = pd.read_csv(csv_path)
-    df.to_sql(table_name, conn, if_exists="replace", index=False)
-    logging.info(f"Loaded {len(df)} rows into table '{table_name}'")
+    rows = 0
+    for i, chunk in enumerate(pd.read_csv(csv_path, dtype=DTYPES, chunksize=CHUNK_ROWS)):
+        chunk.to_sql(table_name, conn, if_exists="replace" if i == 0 else "append", index=False)
+        rows += len(chunk)
+    logging.info(f"Loaded {rows} rows into table '{table_name}'")
+
+def read_batch():
+    path = os.path.join(PROCESSED_DIR, BATCH_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def table_rows(conn, table_name):
+    """Row count of table_name, or None when it does not exist."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+    ).fetchone()
+    if not exists:
+        return None
+    return conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+
+def load_batch(conn, txn_path, aggr_path, batch):
+    """
+    Apply the last transform run incrementally: append the rows it added to
+    sales_transactional.csv and replace the aggregated rows of the dates it
+    touched. Returns False when the warehouse does not line up with the batch
+    (first load, or a run was never loaded), so the caller reloads in full.
+    """
+    loaded = table_rows(conn, "sales_transactional")
+    before, after = batch["rows_before"], batch["rows_before"] + batch["rows"]
+    if not before or loaded not in (before, after) or table_rows(conn, "sales_aggregated") is None:
+        return False
+
+    # Replacing whole dates is safe to repeat if a previous load stopped halfway
+    aggregated = pd.read_csv(aggr_path, dtype=DTYPES)
+    aggregated = aggregated[aggregated["date"].isin(batch["dates"])]
+    conn.executemany("DELETE FROM sales_aggregated WHERE date = ?", [(d,) for d in batch["dates"]])
+    aggregated.to_sql("sales_aggregated", conn, if_exists="append", index=False)
+    logging.info(f"Replaced {len(batch['dates'])} dates in table 'sales_aggregated' ({len(aggregated)} rows)")
+
+    if loaded == after:
+        logging.info("Table 'sales_transactional' already holds the last batch")
+        return True
+    columns = pd.read_csv(txn_path, nrows=0).columns
+    with open(txn_path, "rb") as f:
+        f.seek(batch["offset"])
+        new_rows = pd.read_csv(f, header=None, names=columns, dtype=DTYPES)
+    new_rows.to_sql("sales_transactional", conn, if_exists="append", index=False)
+    logging.info(f"Appended {len(new_rows)} rows to table 'sales_transactional'")
+    return True
 
 def create_indexes(conn):
     cur = conn.cursor()
@@ -39,8 +96,10 @@ def main():
     txn_path = os.path.join(PROCESSED_DIR, "sales_transactional.csv")
     aggr_path = os.path.join(PROCESSED_DIR, "sales_aggregated.csv")
 
-    load_csv_to_sqlite(txn_path, "sales_transactional", conn)
-    load_csv_to_sqlite(aggr_path, "sales_aggregated", conn)
+    batch = read_batch()
+    if batch is None or not load_batch(conn, txn_path, aggr_path, batch):
+        load_csv_to_sqlite(txn_path, "sales_transactional", conn)
+        load_csv_to_sqlite(aggr_path, "sales_aggregated", conn)
     create_indexes(conn)
 
     conn.close()
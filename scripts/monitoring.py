@@ -5,7 +5,6 @@ import sqlite3
 from logging.handlers import RotatingFileHandler
 from datetime import datetime
 import pandas as pd
-from alerts import send_alert
 
 # --------------------------
 # PROJECT ROOT PATHS
@@ -15,6 +14,7 @@ DB_PATH = os.path.join(BASE_DIR, "db", "retail_sales.db")
 LOG_FILE = os.path.join(BASE_DIR, "logs", "monitoring.log")
 SCHEMA_FILE = os.path.join(BASE_DIR, "schema_config.json")
 MONITOR_TABLE = "monitoring_log"
+SOURCES_TABLE = "sales_processed_sources"  # written by transform_sales.py
 
 # --------------------------
 # Logging
@@ -32,11 +32,15 @@ logger = logging.getLogger("monitoring")
 # Import alert function (optional)
 # --------------------------
 try:
-    from scripts.alerts import send_alert
-except Exception:
-    # fallback: define noop if alerts unavailable
-    def send_alert(subject, message):
-        logger.warning("Alert requested but send_alert not available: %s | %s", subject, message)
+    # scheduler.py runs with scripts/ on sys.path
+    from alerts import send_alert
+except ImportError:
+    try:
+        from scripts.alerts import send_alert
+    except ImportError:
+        # fallback: define noop if alerts unavailable
+        def send_alert(subject, message):
+            logger.warning("Alert requested but send_alert not available: %s | %s", subject, message)
 
 
 # --------------------------
@@ -85,6 +89,31 @@ def _last_monitor_row():
         return None
 
 
+def _run_file_stats(conn, since):
+    """
+    Average rows and revenue per ingested file for the files transform_sales
+    applied after `since` (this run) and for the run before them. Either is
+    None when there are no such files.
+    """
+    try:
+        sources = pd.read_sql_query(f"SELECT applied_at, rows, revenue FROM {SOURCES_TABLE}", conn)
+    except Exception:
+        return None, None
+    runs = sources.groupby("applied_at").agg(files=("rows", "size"), rows=("rows", "sum"), revenue=("revenue", "sum"))
+    if since:
+        new, earlier = runs[runs.index > since], runs[runs.index <= since]
+    else:
+        new, earlier = runs.iloc[-1:], runs.iloc[:-1]
+
+    def per_file(frame):
+        if frame.empty:
+            return None
+        files = int(frame["files"].sum())
+        return {"files": files, "rows": frame["rows"].sum() / files, "revenue": frame["revenue"].sum() / files}
+
+    return per_file(new), per_file(earlier.iloc[-1:])
+
+
 # --------------------------
 # Core monitor function
 # --------------------------
@@ -147,20 +176,36 @@ def monitor_pipeline(duration: float):
                 prev_trans = int(last.get("transactional_rows") or 0)
                 prev_rev = float(last.get("total_revenue") or 0.0)
 
-                # Row drop detection
+                # The tables only grow run to run, so a drop in the totals means lost data
                 if prev_trans > 0:
                     drop_pct = (prev_trans - trans_count) / prev_trans
                     if drop_pct >= ROW_DROP_PCT_THRESHOLD:
                         anomalies.append(f"Transactional rows dropped by {drop_pct:.2%} (prev={prev_trans} current={trans_count})")
-
-                # Revenue spike/drop detection (relative change)
                 if prev_rev > 0:
-                    rev_change = abs(total_revenue - prev_rev) / prev_rev
-                    if rev_change >= REVENUE_CHANGE_PCT_THRESHOLD:
-                        anomalies.append(f"Revenue changed by {rev_change:.2%} (prev={prev_rev:.2f} current={total_revenue:.2f})")
+                    rev_drop = (prev_rev - total_revenue) / prev_rev
+                    if rev_drop >= REVENUE_CHANGE_PCT_THRESHOLD:
+                        anomalies.append(f"Total revenue dropped by {rev_drop:.2%} (prev={prev_rev:.2f} current={total_revenue:.2f})")
             except Exception as e:
                 logger.error("Failed to compare with previous monitoring row: %s", e)
 
+        # Compare the files this run added with those of the previous run, per file
+        new_files, prev_files = None, None
+        try:
+            new_files, prev_files = _run_file_stats(conn, last.get("ts") if last is not None else None)
+            if new_files and prev_files:
+                if prev_files["rows"] > 0:
+                    drop_pct = (prev_files["rows"] - new_files["rows"]) / prev_files["rows"]
+                    if drop_pct >= ROW_DROP_PCT_THRESHOLD:
+                        anomalies.append(f"New rows per file dropped by {drop_pct:.2%} (prev={prev_files['rows']:.0f} current={new_files['rows']:.0f})")
+
+                # Revenue spike/drop detection (relative change)
+                if prev_files["revenue"] > 0:
+                    rev_change = abs(new_files["revenue"] - prev_files["revenue"]) / prev_files["revenue"]
+                    if rev_change >= REVENUE_CHANGE_PCT_THRESHOLD:
+                        anomalies.append(f"New revenue per file changed by {rev_change:.2%} (prev={prev_files['revenue']:.2f} current={new_files['revenue']:.2f})")
+        except Exception as e:
+            logger.error("Failed to compare with previous run's files: %s", e)
+
         # Schema critical
         if MISSING_COLS_CRITICAL and any("Missing required columns" in s for s in schema_warnings):
             anomalies.append("CRITICAL: Missing required columns detected.")
@@ -185,7 +230,8 @@ def monitor_pipeline(duration: float):
                 f"Duration: {duration:.2f}s\n"
                 f"Transactional rows: {trans_count}\n"
                 f"Aggregated rows: {agg_count}\n"
-                f"Total revenue: {total_revenue:.2f}\n\n"
+                f"Total revenue: {total_revenue:.2f}\n"
+                f"New files this run: {new_files['files'] if new_files else 0}\n\n"
                 f"Issues:\n- " + "\n- ".join(anomalies + schema_warnings)
             )
             # Non-blocking send with error handling already inside send_alert
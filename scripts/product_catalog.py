@@ -0,0 +1,144 @@
+import os
+import pickle
+import logging
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRODUCT_CATALOG = os.path.join(BASE_DIR, "data", "product_catalog.csv")
+CACHE_DIR = os.path.join(BASE_DIR, "data", "cache")
+
+# Low-cardinality text columns kept as pandas categoricals end to end
+CATEGORICAL_COLUMNS = ["region", "product_id", "category", "brand"]
+
+# Warn when more than this share of sales rows has no catalog entry
+UNMATCHED_WARN_THRESHOLD = 0.05
+
+_memory_cache = {}  # catalog path -> ((mtime_ns, size), DataFrame)
+
+
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast low-cardinality text columns to category and downcast integer counts."""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    if "quantity" in df.columns and pd.api.types.is_integer_dtype(df["quantity"]) and not df["quantity"].isna().any():
+        df["quantity"] = pd.to_numeric(df["quantity"], downcast="integer")
+    return df
+
+
+def concat_categorical(frames) -> pd.DataFrame:
+    """
+    Concatenate frames keeping CATEGORICAL_COLUMNS categorical.
+
+    pd.concat falls back to object when the frames' categories differ, so each
+    column is first recoded onto one CategoricalDtype over the union of
+    categories. Empty frames (header-only files) are skipped since their
+    untyped columns would widen the result's dtypes.
+    """
+    frames = [df for df in frames if not df.empty] or frames[:1]
+    for col in CATEGORICAL_COLUMNS:
+        columns = [df[col] for df in frames if col in df.columns]
+        if len(columns) < 2 or not all(isinstance(c.dtype, pd.CategoricalDtype) for c in columns):
+            continue
+        categories = columns[0].cat.categories
+        for c in columns[1:]:
+            categories = categories.union(c.cat.categories)
+        dtype = pd.CategoricalDtype(categories)
+        frames = [df.assign(**{col: df[col].astype(dtype)}) if col in df.columns else df for df in frames]
+    return compact_dtypes(pd.concat(frames, ignore_index=True))
+
+
+def _cache_file(path):
+    return os.path.join(CACHE_DIR, os.path.basename(path) + ".pkl")
+
+
+def load_catalog(path: str = PRODUCT_CATALOG) -> pd.DataFrame:
+    """
+    Return the product catalog, re-reading the CSV only when its mtime or size changes.
+
+    Parsed catalogs are cached in memory and pickled under data/cache/ so that
+    separate pipeline runs (each a fresh process) also skip the CSV parse.
+    """
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _memory_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    cache_file = _cache_file(path)
+    catalog = None
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, "rb") as f:
+                cached_key, cached_df = pickle.load(f)
+            if cached_key == key:
+                catalog = cached_df
+                logging.info(f"Product catalog loaded from cache: {cache_file}")
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable catalog cache {cache_file}: {e}")
+
+    if catalog is None:
+        catalog = pd.read_csv(path)
+        catalog = catalog.drop_duplicates("product_id", keep="last").reset_index(drop=True)
+        catalog = compact_dtypes(catalog)
+        # Every other text attribute repeats once per sales row after the join
+        for col in catalog.columns:
+            if col != "product_id" and not pd.api.types.is_numeric_dtype(catalog[col]):
+                catalog[col] = catalog[col].astype("category")
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(cache_file, "wb") as f:
+            pickle.dump((key, catalog), f, protocol=pickle.HIGHEST_PROTOCOL)
+        logging.info(f"Product catalog parsed from {path} ({len(catalog)} products)")
+
+    _memory_cache[path] = (key, catalog)
+    return catalog
+
+
+def enrich_with_catalog(sales_df: pd.DataFrame, catalog: pd.DataFrame = None):
+    """
+    Left-join catalog attributes onto sales_df by product_id.
+
+    The join runs on categorical codes: each distinct sales SKU is looked up
+    in the catalog once, and the resulting row positions are broadcast to
+    every sales row with a single integer take. Returns the enriched frame
+    and the share of rows whose SKU is missing from the catalog.
+    """
+    if catalog is None:
+        catalog = load_catalog()
+
+    keys = sales_df["product_id"]
+    if not isinstance(keys.dtype, pd.CategoricalDtype):
+        keys = keys.astype("category")
+
+    catalog_index = pd.Index(catalog["product_id"].astype(str))
+    category_pos = catalog_index.get_indexer(keys.cat.categories.astype(str))
+    codes = keys.cat.codes.to_numpy()
+    # Append -1 so that missing SKUs (code -1) map to "no catalog row"
+    pos = np.append(category_pos, -1)[codes]
+    matched = pos >= 0
+
+    enriched = sales_df.copy()
+    enriched["product_id"] = keys
+    for col in catalog.columns:
+        if col == "product_id":
+            continue
+        values = catalog[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            col_codes = np.where(matched, values.cat.codes.to_numpy()[pos], -1)
+            enriched[col] = pd.Categorical.from_codes(col_codes, dtype=values.dtype)
+        else:
+            taken = values.to_numpy(dtype="float64" if values.dtype.kind in "iu" else None)[pos]
+            enriched[col] = pd.Series(taken, index=sales_df.index).where(matched)
+
+    has_key = codes >= 0
+    unmatched_rate = float((has_key & ~matched).sum() / has_key.sum()) if has_key.any() else 0.0
+    if unmatched_rate > UNMATCHED_WARN_THRESHOLD:
+        missing = sorted(set(keys.cat.categories[category_pos < 0].astype(str)))
+        logging.warning(f"{unmatched_rate:.1%} of sales rows have SKUs missing from the catalog: {missing[:20]}")
+    else:
+        logging.info(f"Catalog join unmatched-SKU rate: {unmatched_rate:.2%}")
+
+    return enriched, unmatched_rate
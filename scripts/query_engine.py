@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import logging
+import threading
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Overridable so the API can be pointed at another warehouse (e.g. benchmarks/load_test.py)
+DB_PATH = os.getenv("RETAIL_DB_PATH", os.path.join(BASE_DIR, "db", "retail_sales.db"))
+PROCESSED_DIR = os.getenv("RETAIL_PROCESSED_DIR", os.path.join(BASE_DIR, "data", "processed"))
+
+# "sqlite" (default) or "duckdb"
+QUERY_ENGINE = os.getenv("QUERY_ENGINE", "sqlite")
+
+PROCESSED_TABLES = ["sales_transactional", "sales_aggregated"]
+
+
+class SQLiteEngine:
+    """Runs queries against the SQLite warehouse written by load_to_db.py."""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+
+    def query(self, sql: str, params=None) -> pd.DataFrame:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return pd.read_sql_query(sql, conn, params=params or [])
+        finally:
+            conn.close()
+
+
+class DuckDBEngine:
+    """
+    Runs queries with embedded DuckDB over the processed CSVs in data/processed/.
+
+    Each processed file is loaded into an in-memory columnar table named after
+    the file and reloaded only when the file's mtime changes, so repeated
+    GROUP BY scans never touch the row store. `date` is kept as text so
+    results match the SQLite backend exactly.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, processed_dir: str = PROCESSED_DIR, tables=PROCESSED_TABLES):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise RuntimeError("QUERY_ENGINE=duckdb requires the 'duckdb' package") from e
+        self.processed_dir = processed_dir
+        self.tables = list(tables)
+        self._conn = duckdb.connect(database=":memory:")
+        self._loaded = {}  # table -> mtime of the file it was loaded from
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        for table in self.tables:
+            path = os.path.join(self.processed_dir, f"{table}.csv")
+            if not os.path.exists(path):
+                continue
+            mtime = os.path.getmtime(path)
+            if self._loaded.get(table) == mtime:
+                continue
+            self._conn.execute(f"""
+                CREATE OR REPLACE TABLE {table} AS
+                SELECT * REPLACE (CAST(date AS VARCHAR) AS date)
+                FROM read_csv_auto(?, header = true)
+            """, [path])
+            self._loaded[table] = mtime
+            logging.info(f"DuckDB loaded {table} from {path}")
+
+    def query(self, sql: str, params=None) -> pd.DataFrame:
+        with self._lock:
+            self._refresh()
+        # Cursors are independent connections to the same database, safe per thread
+        cursor = self._conn.cursor()
+        try:
+            result = cursor.execute(sql, list(params or []))
+            types = [str(d[1]) for d in result.description]
+            df = result.df()
+        finally:
+            cursor.close()
+        # DuckDB widens SUM over integers to HUGEINT, which pandas receives as
+        # float64; SQLite returns int64, so narrow it back when there are no NULLs
+        for col, type_name in zip(df.columns, types):
+            if type_name == "HUGEINT" and df[col].notna().all():
+                df[col] = df[col].astype("int64")
+        return df
+
+
+ENGINES = {
+    SQLiteEngine.name: SQLiteEngine,
+    DuckDBEngine.name: DuckDBEngine,
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(name: str = None):
+    """Return the shared engine instance for `name` (defaults to QUERY_ENGINE)."""
+    name = (name or QUERY_ENGINE).lower()
+    if name not in ENGINES:
+        raise ValueError(f"Unknown query engine '{name}', expected one of {sorted(ENGINES)}")
+    with _engines_lock:
+        if name not in _engines:
+            _engines[name] = ENGINES[name]()
+        return _engines[name]
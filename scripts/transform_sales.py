@@ -1,16 +1,29 @@
 import os
+import json
+import sqlite3
 import pandas as pd
 import logging
 from datetime import datetime
+from product_catalog import CATEGORICAL_COLUMNS, PRODUCT_CATALOG, compact_dtypes, concat_categorical, enrich_with_catalog, load_catalog
+from sketches import SKETCH_TABLE, applied_sketch_sources, build_partition_sketches, save_sketches
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 INGESTED_DIR = os.path.join(BASE_DIR, "data", "ingested")
 PROCESSED_DIR = os.path.join(BASE_DIR, "data", "processed")
-PRODUCT_CATALOG = os.path.join(BASE_DIR, "data", "product_catalog.csv")
+DB_PATH = os.path.join(BASE_DIR, "db", "retail_sales.db")
 LOG_FILE = os.path.join(BASE_DIR, "logs", "transform_sales.log")
 
+# Ingested files already in the processed tables, with per-file stats for monitoring.py
+SOURCES_TABLE = "sales_processed_sources"
+# Where the last run's rows start in sales_transactional.csv, read by load_to_db.py
+BATCH_FILE = "last_batch.json"
+
+AGGREGATE_KEYS = ["date", "region", "product_id"]
+AGGREGATE_INPUTS = AGGREGATE_KEYS + ["revenue", "total_cost", "profit", "margin_percent", "quantity"]
+
 os.makedirs(PROCESSED_DIR, exist_ok=True)
+os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
 
 logging.basicConfig(
@@ -19,41 +32,83 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(message)s"
 )
 
-def load_latest_ingested():
+def ingested_files():
     files = sorted(
         [f for f in os.listdir(INGESTED_DIR) if f.endswith(".csv")],
-        key=lambda x: os.path.getmtime(os.path.join(INGESTED_DIR, x)),
-        reverse=True
+        key=lambda x: os.path.getmtime(os.path.join(INGESTED_DIR, x))
     )
     if not files:
         raise FileNotFoundError("No ingested files found.")
-    latest = files[0]
-    logging.info(f"Loaded latest ingested file: {latest}")
-    return pd.read_csv(os.path.join(INGESTED_DIR, latest))
+    return files
 
-def transform_sales():
-    start = datetime.now()
+def read_ingested(file):
+    dtypes = {col: "category" for col in CATEGORICAL_COLUMNS}
+    return compact_dtypes(pd.read_csv(os.path.join(INGESTED_DIR, file), dtype=dtypes))
 
-    sales_df = load_latest_ingested()
-    product_df = pd.read_csv(PRODUCT_CATALOG)
+# --------------------------
+# Processed sources
+# --------------------------
+def _ensure_sources_table(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SOURCES_TABLE} (
+            source TEXT PRIMARY KEY,
+            applied_at TEXT,
+            rows INTEGER,
+            revenue REAL,
+            min_date TEXT,
+            max_date TEXT
+        );
+    """)
 
-    # Merge with product catalog
-    merged = pd.merge(sales_df, product_df, on="product_id", how="left")
+def processed_sources(db_path: str) -> pd.DataFrame:
+    conn = sqlite3.connect(db_path)
+    try:
+        _ensure_sources_table(conn)
+        return pd.read_sql_query(f"SELECT * FROM {SOURCES_TABLE}", conn)
+    finally:
+        conn.close()
 
-    # Clean and compute KPIs
-    merged["date"] = pd.to_datetime(merged["date"])
-    merged["total_cost"] = merged["cost"] * merged["quantity"]
-    merged["profit"] = merged["revenue"] - merged["total_cost"]
-    merged["margin_percent"] = ((merged["profit"] / merged["revenue"]) * 100).round(2)
+def record_sources(db_path: str, sources: pd.DataFrame):
+    conn = sqlite3.connect(db_path)
+    try:
+        _ensure_sources_table(conn)
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {SOURCES_TABLE} ({', '.join(sources.columns)}) "
+            f"VALUES ({', '.join('?' for _ in sources.columns)})",
+            sources.astype(object).where(sources.notna(), None).itertuples(index=False, name=None),
+        )
+        conn.commit()
+    finally:
+        conn.close()
 
-    # Transactional output
-    transactional_path = os.path.join(PROCESSED_DIR, "sales_transactional.csv")
-    merged.to_csv(transactional_path, index=False)
-    logging.info(f"Transactional dataset saved: {transactional_path} ({len(merged)} rows)")
+def summarize_sources(frames, applied_at):
+    rows = []
+    for file, df in frames.items():
+        dates = pd.to_datetime(df["date"])
+        rows.append({
+            "source": file,
+            "applied_at": applied_at,
+            "rows": len(df),
+            "revenue": float(pd.to_numeric(df["revenue"]).sum()),
+            "min_date": dates.min().strftime("%Y-%m-%d") if len(df) else None,
+            "max_date": dates.max().strftime("%Y-%m-%d") if len(df) else None,
+        })
+    return pd.DataFrame(rows)
+
+# --------------------------
+# KPIs
+# --------------------------
+def add_kpis(df):
+    df["date"] = pd.to_datetime(df["date"])
+    df["total_cost"] = df["cost"] * df["quantity"]
+    df["profit"] = df["revenue"] - df["total_cost"]
+    df["margin_percent"] = ((df["profit"] / df["revenue"]) * 100).round(2)
+    return df
 
-    # Aggregated table (daily × region × product)
+def aggregate(df):
+    """Daily × region × product aggregates."""
     aggregated = (
-        merged.groupby(["date", "region", "product_id"], as_index=False)
+        df.groupby(AGGREGATE_KEYS, as_index=False, observed=True)
         .agg({
             "revenue": "sum",
             "total_cost": "sum",
@@ -63,13 +118,135 @@ def transform_sales():
         })
     )
     aggregated["margin_percent"] = aggregated["margin_percent"].round(2)
+    return aggregated
 
+def earlier_rows(sources, dates):
+    """
+    Rows on `dates` from files already processed, for re-aggregating those dates.
+
+    Only files whose recorded date range overlaps `dates` are read, so the cost
+    follows the affected days rather than the length of the history.
+    """
+    first, last = dates.min().strftime("%Y-%m-%d"), dates.max().strftime("%Y-%m-%d")
+    overlapping = sources[(sources["rows"] > 0) & (sources["min_date"] <= last) & (sources["max_date"] >= first)]
+    frames = []
+    for file in overlapping["source"]:
+        df = add_kpis(read_ingested(file))
+        frames.append(df[df["date"].isin(dates)])
+    return frames
+
+# --------------------------
+# Last batch (undo an append whose run failed)
+# --------------------------
+def read_batch():
+    path = os.path.join(PROCESSED_DIR, BATCH_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def write_batch(batch):
+    path = os.path.join(PROCESSED_DIR, BATCH_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(batch, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def rollback_unrecorded_batch(recorded):
+    """Truncate sales_transactional.csv back to the last batch if that run never recorded its sources."""
+    batch = read_batch()
+    if batch is None or set(batch["sources"]) <= recorded:
+        return
+    transactional_path = os.path.join(PROCESSED_DIR, "sales_transactional.csv")
+    if os.path.exists(transactional_path) and os.path.getsize(transactional_path) > batch["offset"]:
+        if batch["offset"] == 0:
+            os.remove(transactional_path)
+        else:
+            os.truncate(transactional_path, batch["offset"])
+        logging.warning(f"Rolled back unrecorded rows of {batch['sources']} from {transactional_path}")
+
+def apply_new_files(pending, sources, rebuild):
+    """
+    Append rows of `pending` ingested files to the processed tables and
+    re-aggregate the dates they touch. Returns the files' frames and the
+    unmatched SKU rate.
+    """
+    transactional_path = os.path.join(PROCESSED_DIR, "sales_transactional.csv")
     aggregated_path = os.path.join(PROCESSED_DIR, "sales_aggregated.csv")
+
+    frames = {file: read_ingested(file) for file in pending}
+    sales_df = concat_categorical(list(frames.values()))
+    if sales_df.empty:
+        # Fully duplicate exports (header only): nothing to add
+        logging.warning(f"No new rows in {pending}; processed tables unchanged")
+        return frames, 0.0
+
+    product_df = load_catalog(PRODUCT_CATALOG)
+
+    # Enrich with product catalog (categorical-code join) and compute KPIs
+    merged, unmatched_rate = enrich_with_catalog(sales_df, product_df)
+    merged = add_kpis(merged)
+    dates = pd.DatetimeIndex(merged["date"].unique()).sort_values()
+
+    # Aggregated table: recompute only the affected dates, from the new rows plus
+    # earlier rows on those dates, and keep every other date as it was
+    aggregated = aggregate(concat_categorical(
+        [df[AGGREGATE_INPUTS] for df in [merged] + earlier_rows(sources, dates)]
+    ))
+    if not rebuild and os.path.exists(aggregated_path):
+        dtypes = {col: "category" for col in CATEGORICAL_COLUMNS}
+        previous = pd.read_csv(aggregated_path, dtype=dtypes, parse_dates=["date"])
+        aggregated = concat_categorical([previous[~previous["date"].isin(dates)], aggregated])
+        aggregated = aggregated.sort_values(AGGREGATE_KEYS, ignore_index=True)
+
+    # Transactional output: append the new rows, recording where they start first
+    write_batch({
+        "sources": pending,
+        "offset": 0 if rebuild else os.path.getsize(transactional_path),
+        "rows_before": int(sources["rows"].sum()),
+        "rows": len(merged),
+        "dates": [d.strftime("%Y-%m-%d") for d in dates],
+    })
+    merged.to_csv(transactional_path, mode="w" if rebuild else "a", header=rebuild, index=False)
+    logging.info(f"Transactional dataset appended: {transactional_path} (+{len(merged)} rows)")
+
     aggregated.to_csv(aggregated_path, index=False)
-    logging.info(f"Aggregated dataset saved: {aggregated_path} ({len(aggregated)} rows)")
+    logging.info(f"Aggregated dataset saved: {aggregated_path} ({len(dates)} dates re-aggregated, {len(aggregated)} rows)")
+    return frames, unmatched_rate
+
+def transform_sales():
+    start = datetime.now()
+
+    files = ingested_files()
+    sources = processed_sources(DB_PATH)
+    rollback_unrecorded_batch(set(sources["source"]))
+
+    transactional_path = os.path.join(PROCESSED_DIR, "sales_transactional.csv")
+    rebuild = sources.empty or not os.path.exists(transactional_path) or os.path.getsize(transactional_path) == 0
+    if rebuild:
+        # First run (or processed layer lost): build once from every ingested file
+        sources = sources.iloc[:0]
+    pending = [f for f in files if f not in set(sources["source"])]
+
+    frames, unmatched_rate = {}, 0.0
+    if pending:
+        logging.info(f"Processing {len(pending)} new ingested files" + (" (full rebuild)" if rebuild else ""))
+        frames, unmatched_rate = apply_new_files(pending, sources, rebuild)
+        record_sources(DB_PATH, summarize_sources(frames, start.strftime("%Y-%m-%d %H:%M:%S")))
+    else:
+        logging.info("No new ingested files; processed tables unchanged")
+
+    # Mergeable sketches per date × region (distinct SKUs, basket percentiles),
+    # merged in once per ingested file
+    applied = applied_sketch_sources(DB_PATH)
+    for file in files:
+        if file in applied:
+            continue
+        sketch_df = build_partition_sketches(frames[file] if file in frames else read_ingested(file))
+        save_sketches(sketch_df, DB_PATH, source=file)
+        logging.info(f"Sketches merged: {DB_PATH}:{SKETCH_TABLE} ({len(sketch_df)} partitions from {file})")
 
     duration = (datetime.now() - start).total_seconds()
-    logging.info(f"Transformation completed in {duration:.2f}s")
+    logging.info(f"Transformation completed in {duration:.2f}s (unmatched SKU rate {unmatched_rate:.2%})")
 
 if __name__ == "__main__":
     logging.info("==== Transformation Run Started ====")
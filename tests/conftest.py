@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Pipeline modules import each other as top-level scripts (e.g. `from alerts import ...`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
@@ -0,0 +1,108 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from alerts import AlertDispatcher
+
+
+@pytest.fixture
+def webhook():
+    """Local stand-in for the Slack webhook; fails the first `fail_first` requests with 500."""
+    state = {"payloads": [], "attempts": 0, "fail_first": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            state["attempts"] += 1
+            if state["attempts"] <= state["fail_first"]:
+                status, reply = 500, b"boom"
+            else:
+                state["payloads"].append(json.loads(body))
+                status, reply = 200, b"ok"
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def make_dispatcher(url, **kwargs):
+    options = dict(webhook_url=url, backoff_base=0.01, batch_window=0.2, dedup_window=60, max_retries=3)
+    options.update(kwargs)
+    return AlertDispatcher(mode="slack", **options)
+
+
+def test_duplicates_are_suppressed_and_batched_into_one_digest(webhook):
+    dispatcher = make_dispatcher(webhook["url"])
+    try:
+        for _ in range(5):
+            dispatcher.send("Row drop", "rows fell")
+        dispatcher.send("Revenue spike", "revenue jumped")
+        dispatcher.flush(timeout=5)
+
+        assert dispatcher.sent == 1
+        assert dispatcher.suppressed == 4
+        assert len(webhook["payloads"]) == 1
+        text = webhook["payloads"][0]["text"]
+        assert "2 pipeline alerts" in text
+        assert "Row drop" in text and "Revenue spike" in text
+
+        # Still inside the dedup window: a repeat is not delivered again
+        dispatcher.send("Row drop", "rows fell again")
+        dispatcher.flush(timeout=5)
+        assert dispatcher.suppressed == 5
+        assert len(webhook["payloads"]) == 1
+    finally:
+        dispatcher.shutdown(timeout=5)
+
+
+def test_non_200_responses_are_retried(webhook):
+    webhook["fail_first"] = 2
+    dispatcher = make_dispatcher(webhook["url"])
+    try:
+        dispatcher.send("Pipeline failure", "step failed")
+        dispatcher.flush(timeout=5)
+
+        assert webhook["attempts"] == 3
+        assert dispatcher.sent == 1
+        assert dispatcher.failed == 0
+        assert "Pipeline failure" in webhook["payloads"][0]["text"]
+    finally:
+        dispatcher.shutdown(timeout=5)
+
+
+def test_gives_up_after_max_retries(webhook):
+    webhook["fail_first"] = 100
+    dispatcher = make_dispatcher(webhook["url"], max_retries=2)
+    try:
+        dispatcher.send("Pipeline failure", "step failed")
+        dispatcher.flush(timeout=5)
+
+        assert webhook["attempts"] == 3
+        assert dispatcher.sent == 0
+        assert dispatcher.failed == 1
+    finally:
+        dispatcher.shutdown(timeout=5)
+
+
+def test_send_never_blocks_when_queue_is_full(webhook):
+    dispatcher = make_dispatcher(webhook["url"], maxsize=1, max_batch_size=1)
+    try:
+        results = [dispatcher.send(f"alert {i}", "msg") for i in range(50)]
+        assert results[0] is True
+        assert dispatcher.dropped == results.count(False) > 0
+    finally:
+        dispatcher.shutdown(timeout=5)
@@ -0,0 +1,151 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dedup
+from dedup import FingerprintIndex, row_fingerprints, seed_from_files
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Merges of a few hundred keys then cross many pivot boundaries
+    monkeypatch.setattr(dedup, "MERGE_CHUNK", 7)
+
+
+def random_keys(rng, n):
+    return rng.integers(0, np.iinfo(np.uint64).max, n, dtype=np.uint64, endpoint=True)
+
+
+def run_lengths(index):
+    return [len(index._open(run)) for run in index.runs]
+
+
+def assert_matches(index, seen, probes):
+    expected = np.fromiter((int(p) in seen for p in probes), dtype=bool, count=len(probes))
+    np.testing.assert_array_equal(index.contains(probes), expected)
+
+
+def test_contains_matches_set_across_adds_and_reopen(tmp_path, small_chunks):
+    rng = np.random.default_rng(5)
+    index = FingerprintIndex(str(tmp_path))
+    seen = set()
+    for size in [50, 3, 200, 1, 17, 400, 9, 64]:
+        batch = random_keys(rng, size)
+        # Repeat part of the history and part of the batch itself
+        if seen:
+            batch = np.concatenate([batch, rng.choice(np.array(sorted(seen), dtype=np.uint64), 5)])
+        batch = np.concatenate([batch, batch[:2]])
+        added = index.add(batch)
+        assert added == len(set(map(int, batch)) - seen)
+        seen |= set(map(int, batch))
+
+        runs = [index._open(run) for run in index.runs]
+        for keys in runs:
+            assert np.all(keys[1:] > keys[:-1])  # sorted and unique within a run
+        assert sum(len(keys) for keys in runs) == len(seen)  # disjoint across runs
+
+    probes = np.concatenate([np.array(sorted(seen), dtype=np.uint64), random_keys(rng, 500)])
+    assert_matches(index, seen, probes)
+
+    reopened = FingerprintIndex(str(tmp_path))
+    assert reopened.exists
+    assert reopened.runs == index.runs
+    assert len(reopened) == len(seen)
+    assert_matches(reopened, seen, probes)
+    # Only the runs listed in the manifest are left on disk
+    with open(tmp_path / "manifest.json") as f:
+        assert sorted(json.load(f)["runs"] + ["manifest.json"]) == sorted(os.listdir(tmp_path))
+
+
+def test_merge_runs_across_chunk_pivots(tmp_path, small_chunks):
+    rng = np.random.default_rng(7)
+    keys = np.unique(random_keys(rng, 1000))
+    # Interleaved halves so that every merge step takes keys from both runs
+    older, newer = keys[::2], keys[1::2]
+    index = FingerprintIndex(str(tmp_path))
+    merged = index._merge_runs(index._write_run(older), index._write_run(newer))
+    np.testing.assert_array_equal(index._open(merged), keys)
+
+
+def test_compaction_keeps_size_tiers(tmp_path, small_chunks):
+    rng = np.random.default_rng(11)
+    index = FingerprintIndex(str(tmp_path))
+    index.add(random_keys(rng, 1000))
+    index.add(random_keys(rng, 100))
+    # The older run is over TIER_RATIO times larger, so both are kept
+    assert run_lengths(index) == [1000, 100]
+
+    index.add(random_keys(rng, 50))
+    # 100 <= 4 * 50: the newest two merge, then 1000 > 4 * 150 stops compaction
+    assert run_lengths(index) == [1000, 150]
+
+    index.add(random_keys(rng, 600))
+    # 150 <= 4 * 600, then 1000 <= 4 * 750
+    assert run_lengths(index) == [1750]
+
+
+def test_compaction_caps_run_count(tmp_path, small_chunks, monkeypatch):
+    monkeypatch.setattr(dedup, "MAX_RUNS", 3)
+    rng = np.random.default_rng(13)
+    index = FingerprintIndex(str(tmp_path))
+    seen = set()
+    # Each batch is much smaller than the last, so only MAX_RUNS forces merges
+    for size in [10_000, 2000, 400, 80, 16]:
+        batch = random_keys(rng, size)
+        index.add(batch)
+        seen |= set(map(int, batch))
+        assert len(index.runs) <= 3
+    # The fourth and fifth runs are folded into the newest run to stay at MAX_RUNS
+    assert run_lengths(index) == [10_000, 2000, 496]
+    assert_matches(index, seen, np.array(sorted(seen), dtype=np.uint64))
+
+
+def test_compaction_failure_keeps_added_keys(tmp_path, monkeypatch):
+    rng = np.random.default_rng(17)
+    index = FingerprintIndex(str(tmp_path))
+    first, second = random_keys(rng, 100), random_keys(rng, 100)
+    index.add(first)
+
+    def failing_merge(self, older, newer):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(FingerprintIndex, "_merge_runs", failing_merge)
+    assert index.add(second) == len(second)
+
+    reopened = FingerprintIndex(str(tmp_path))
+    assert reopened.contains(np.concatenate([first, second])).all()
+
+
+def test_seed_from_files(tmp_path):
+    rows = pd.DataFrame({
+        "date": ["2025-11-01", "2025-11-01", "2025-11-02"],
+        "region": ["North", "South", "North"],
+        "product_id": ["P001", "P002", "P001"],
+        "revenue": [120.5, 80.0, 99.9],
+        "cost": [50.0, 40.0, 45.0],
+        "quantity": [2, 1, 2],
+    })
+    paths = [str(tmp_path / "a.csv"), str(tmp_path / "b.csv"), str(tmp_path / "empty.csv")]
+    rows.iloc[:2].to_csv(paths[0], index=False)
+    rows.iloc[1:].to_csv(paths[1], index=False)
+    rows.iloc[:0].to_csv(paths[2], index=False)
+
+    index = FingerprintIndex(str(tmp_path / "index"))
+    assert not index.exists
+    assert seed_from_files(index, paths) == len(rows)
+
+    reopened = FingerprintIndex(str(tmp_path / "index"))
+    assert reopened.exists
+    # Fingerprints of a re-read CSV match those of the in-memory frame
+    assert reopened.contains(row_fingerprints(rows)).all()
+    changed = rows.assign(quantity=rows["quantity"] + 1)
+    assert not reopened.contains(row_fingerprints(changed)).any()
+
+
+def test_seed_from_no_files_marks_index_initialised(tmp_path):
+    index = FingerprintIndex(str(tmp_path))
+    assert seed_from_files(index, []) == 0
+    assert FingerprintIndex(str(tmp_path)).exists
@@ -0,0 +1,207 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dedup
+import extract_sales
+import load_to_db
+import product_catalog
+import transform_sales
+from sketches import SKETCH_TABLE
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """Point extract/transform at empty temp dirs and return a runner for one ETL pass."""
+    dirs = {name: tmp_path / name for name in ["raw", "ingested", "processed", "dedup_index", "cache"]}
+    for path in dirs.values():
+        path.mkdir()
+    db_path = tmp_path / "retail_sales.db"
+
+    monkeypatch.setattr(extract_sales, "RAW_DIR", str(dirs["raw"]))
+    monkeypatch.setattr(extract_sales, "INGESTED_DIR", str(dirs["ingested"]))
+    monkeypatch.setattr(extract_sales, "INDEX_DIR", str(dirs["dedup_index"]))
+    monkeypatch.setattr(transform_sales, "INGESTED_DIR", str(dirs["ingested"]))
+    monkeypatch.setattr(transform_sales, "PROCESSED_DIR", str(dirs["processed"]))
+    monkeypatch.setattr(transform_sales, "DB_PATH", str(db_path))
+    monkeypatch.setattr(load_to_db, "PROCESSED_DIR", str(dirs["processed"]))
+    monkeypatch.setattr(load_to_db, "DB_PATH", str(db_path))
+    monkeypatch.setattr(product_catalog, "CACHE_DIR", str(dirs["cache"]))
+
+    def run(file, df):
+        df.to_csv(dirs["raw"] / file, index=False)
+        extract_sales.ingest_sales_files()
+        transform_sales.transform_sales()
+        load_to_db.main()
+        conn = sqlite3.connect(db_path)
+        sketches = pd.read_sql_query(f"SELECT * FROM {SKETCH_TABLE}", conn)
+        warehouse = {
+            table: pd.read_sql_query(f"SELECT * FROM {table}", conn)
+            for table in ["sales_transactional", "sales_aggregated"]
+        }
+        conn.close()
+        return {
+            "ingested": pd.read_csv(dirs["ingested"] / file),
+            "transactional": pd.read_csv(dirs["processed"] / "sales_transactional.csv"),
+            "aggregated": pd.read_csv(dirs["processed"] / "sales_aggregated.csv"),
+            "sketches": sketches,
+            "warehouse": warehouse,
+        }
+
+    return run
+
+
+def export(n_rows, start_date, seed):
+    rng = np.random.default_rng(seed)
+    cost = rng.uniform(50, 200, n_rows).round(2)
+    quantity = rng.integers(1, 11, n_rows)
+    return pd.DataFrame({
+        "date": (pd.Timestamp(start_date) + pd.to_timedelta(rng.integers(0, 5, n_rows), unit="D")).strftime("%Y-%m-%d"),
+        "region": np.array(["North", "South", "East", "West"])[rng.integers(0, 4, n_rows)],
+        "product_id": [f"P{i:03d}" for i in rng.integers(1, 21, n_rows)],
+        "revenue": (cost * quantity * rng.uniform(1.1, 1.5, n_rows)).round(2),
+        "cost": cost,
+        "quantity": quantity,
+    })
+
+
+def sketched_rows(sketches):
+    return int(sketches.loc[sketches["metric"] == "basket_revenue", "n_rows"].sum())
+
+
+def full_aggregate(exports):
+    """sales_aggregated as a from-scratch rebuild over every export would produce it."""
+    rows = transform_sales.add_kpis(pd.concat(exports, ignore_index=True))
+    aggregated = transform_sales.aggregate(rows)
+    aggregated["date"] = aggregated["date"].dt.strftime("%Y-%m-%d")
+    return aggregated
+
+
+def assert_same_rows(actual, expected, keys=("date", "region", "product_id")):
+    keys = list(keys)
+    pd.testing.assert_frame_equal(
+        actual.sort_values(keys, ignore_index=True)[list(expected.columns)],
+        expected.sort_values(keys, ignore_index=True),
+        check_dtype=False,
+    )
+
+
+def assert_warehouse_matches_processed(result):
+    assert_same_rows(result["warehouse"]["sales_aggregated"], result["aggregated"])
+    assert len(result["warehouse"]["sales_transactional"]) == len(result["transactional"])
+    assert result["warehouse"]["sales_transactional"]["revenue"].sum() == pytest.approx(result["transactional"]["revenue"].sum())
+
+
+def test_fully_overlapping_export_keeps_processed_layer(pipeline):
+    first = export(300, "2025-11-01", seed=1)
+    before = pipeline("sales_a.csv", first)
+
+    processed = {
+        name: os.path.join(transform_sales.PROCESSED_DIR, f"{name}.csv")
+        for name in ["sales_transactional", "sales_aggregated"]
+    }
+    written = {name: (os.stat(path).st_mtime_ns, open(path, "rb").read()) for name, path in processed.items()}
+
+    after = pipeline("sales_a_reexport.csv", first.copy())
+
+    assert after["ingested"].empty
+    # A header-only export leaves the processed files untouched
+    for name, path in processed.items():
+        assert (os.stat(path).st_mtime_ns, open(path, "rb").read()) == written[name]
+    assert len(after["transactional"]) == len(first)
+    assert after["aggregated"]["revenue"].sum() == pytest.approx(first["revenue"].sum())
+    pd.testing.assert_frame_equal(after["aggregated"], before["aggregated"])
+    assert_warehouse_matches_processed(after)
+    assert len(after["sketches"]) == len(before["sketches"]) > 0
+    assert sketched_rows(after["sketches"]) == len(first)
+
+
+def test_partly_overlapping_export_counts_each_row_once(pipeline):
+    first = export(300, "2025-11-01", seed=1)
+    pipeline("sales_a.csv", first)
+
+    fresh = export(200, "2025-11-04", seed=2)
+    overlapping = pd.concat([first.iloc[:150], fresh], ignore_index=True)
+    after = pipeline("sales_b.csv", overlapping)
+
+    expected = pd.concat([first, fresh], ignore_index=True)
+    assert len(after["ingested"]) == len(fresh)
+    assert len(after["transactional"]) == len(expected)
+    assert after["aggregated"]["revenue"].sum() == pytest.approx(expected["revenue"].sum())
+    # Days only present in the first export survive the second run
+    assert set(after["aggregated"]["date"]) == set(expected["date"])
+    assert sketched_rows(after["sketches"]) == len(expected)
+    assert set(after["sketches"]["date"]) == set(expected["date"])
+    # Overlapping days are re-aggregated from both files' rows
+    assert_same_rows(after["aggregated"], full_aggregate([first, fresh]))
+    assert_warehouse_matches_processed(after)
+
+
+def test_only_new_files_are_read(pipeline, monkeypatch):
+    november = export(300, "2025-11-01", seed=1)
+    pipeline("sales_a.csv", november)
+    overlapping = export(200, "2025-11-03", seed=2)
+    pipeline("sales_b.csv", overlapping)
+
+    reads = []
+    read_ingested = transform_sales.read_ingested
+    monkeypatch.setattr(transform_sales, "read_ingested", lambda file: reads.append(file) or read_ingested(file))
+    december = export(100, "2025-12-01", seed=3)
+    after = pipeline("sales_c.csv", december)
+
+    # No earlier file covers December, so nothing but the new export is re-read
+    assert reads == ["sales_c.csv"]
+    exports = [november, overlapping, december]
+    assert len(after["transactional"]) == sum(len(df) for df in exports)
+    assert_same_rows(after["aggregated"], full_aggregate(exports))
+    assert_warehouse_matches_processed(after)
+
+    # A run with nothing new reads no files and leaves every table as it was
+    reads.clear()
+    transform_sales.transform_sales()
+    load_to_db.main()
+    assert reads == []
+    assert len(pd.read_csv(os.path.join(transform_sales.PROCESSED_DIR, "sales_transactional.csv"))) == len(after["transactional"])
+
+
+def test_failed_run_is_rolled_back_before_retry(pipeline, monkeypatch):
+    first = export(300, "2025-11-01", seed=1)
+    pipeline("sales_a.csv", first)
+    second = export(200, "2025-11-03", seed=2)
+
+    def failing_record(db_path, sources):
+        raise OSError("database is locked")
+
+    # The rows are appended, but the run fails before recording its sources
+    with monkeypatch.context() as m:
+        m.setattr(transform_sales, "record_sources", failing_record)
+        with pytest.raises(OSError):
+            pipeline("sales_b.csv", second)
+
+    after = pipeline("sales_c.csv", export(0, "2025-11-01", seed=3))
+
+    assert len(after["transactional"]) == len(first) + len(second)
+    assert_same_rows(after["aggregated"], full_aggregate([first, second]))
+    assert_warehouse_matches_processed(after)
+
+
+def test_failed_index_update_retries_the_export(pipeline, monkeypatch):
+    first = export(300, "2025-11-01", seed=1)
+    first.to_csv(os.path.join(extract_sales.RAW_DIR, "sales_a.csv"), index=False)
+
+    def failing_add(self, fingerprints):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as m:
+        m.setattr(dedup.FingerprintIndex, "add", failing_add)
+        extract_sales.ingest_sales_files()
+    # Nothing left behind for the next run to skip
+    assert not os.path.exists(os.path.join(extract_sales.INGESTED_DIR, "sales_a.csv"))
+
+    extract_sales.ingest_sales_files()
+    assert len(pd.read_csv(os.path.join(extract_sales.INGESTED_DIR, "sales_a.csv"))) == len(first)
+    index = dedup.FingerprintIndex(extract_sales.INDEX_DIR)
+    assert index.contains(dedup.row_fingerprints(first)).all()
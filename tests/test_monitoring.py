@@ -0,0 +1,82 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+import alerts
+import monitoring
+
+
+def test_monitoring_uses_the_alert_dispatcher():
+    # Imported the way scheduler.py imports it (scripts/ on sys.path)
+    assert monitoring.send_alert is alerts.send_alert
+
+
+@pytest.fixture
+def warehouse(tmp_path, monkeypatch):
+    """Temp warehouse with a fake clock; returns a helper that applies one pipeline run."""
+    db_path = str(tmp_path / "retail_sales.db")
+    monkeypatch.setattr(monitoring, "DB_PATH", db_path)
+    sent = []
+    monkeypatch.setattr(monitoring, "send_alert", lambda subject, message: sent.append(message))
+
+    class Clock(datetime):
+        current = datetime(2025, 11, 1, 6, 0, 0)
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.current
+
+    monkeypatch.setattr(monitoring, "datetime", Clock)
+
+    def run(files):
+        """Append `files` (name -> (rows, revenue per row)) as one transform run, then monitor it."""
+        Clock.current += timedelta(hours=1)
+        applied_at = Clock.current.strftime("%Y-%m-%d %H:%M:%S")
+        transactional, sources = [], []
+        for name, (rows, revenue) in files.items():
+            transactional.append(pd.DataFrame({
+                "date": "2025-11-01", "region": "North", "product_id": "P001",
+                "revenue": [revenue] * rows, "cost": 50.0, "quantity": 1,
+            }))
+            sources.append({"source": name, "applied_at": applied_at, "rows": rows, "revenue": rows * revenue})
+        conn = sqlite3.connect(db_path)
+        pd.concat(transactional).to_sql("sales_transactional", conn, if_exists="append", index=False)
+        pd.concat(transactional).to_sql("sales_aggregated", conn, if_exists="append", index=False)
+        pd.DataFrame(sources).to_sql(monitoring.SOURCES_TABLE, conn, if_exists="append", index=False)
+        conn.close()
+
+        Clock.current += timedelta(seconds=30)
+        sent.clear()
+        monitoring.monitor_pipeline(1.0)
+        return [issue for message in sent for issue in message.split("\n- ")[1:]]
+
+    return run
+
+
+def test_per_run_checks_compare_new_files(warehouse):
+    # First run after an upgrade backfills every ingested file at once
+    assert warehouse({f"sales_{i}.csv": (500, 900.0) for i in range(8)}) == []
+    # The cumulative totals grew 12%, but per file the new export matches the backfill
+    assert warehouse({"sales_8.csv": (480, 920.0)}) == []
+
+    issues = warehouse({"sales_9.csv": (450, 500.0)})
+    assert len(issues) == 1 and issues[0].startswith("New revenue per file changed by")
+
+    issues = warehouse({"sales_10.csv": (0, 0.0)})
+    assert [issue.split(" by ")[0] for issue in issues] == ["New rows per file dropped", "New revenue per file changed"]
+
+
+def test_shrinking_tables_are_flagged(warehouse):
+    warehouse({"sales_0.csv": (500, 900.0)})
+    conn = sqlite3.connect(monitoring.DB_PATH)
+    conn.execute("DELETE FROM sales_transactional WHERE rowid % 4 != 0")
+    conn.execute("DELETE FROM sales_aggregated WHERE rowid % 4 != 0")
+    conn.commit()
+    conn.close()
+
+    issues = warehouse({"sales_1.csv": (10, 900.0)})
+
+    assert any(issue.startswith("Transactional rows dropped by") for issue in issues)
+    assert any(issue.startswith("Total revenue dropped by") for issue in issues)
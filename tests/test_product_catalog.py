@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import product_catalog
+from product_catalog import enrich_with_catalog, load_catalog
+
+CATALOG = pd.DataFrame({
+    "product_id": ["P001", "P002", "P003"],
+    "product_name": ["Smartphone A", "Laptop X", "Headphones Z"],
+    "category": ["Electronics", "Electronics", "Accessories"],
+    "brand": ["TechNova", "ComputeCore", "SoundMax"],
+    "cost_price": [200, 750, 80],
+})
+
+
+@pytest.fixture
+def catalog_path(tmp_path, monkeypatch):
+    """Write CATALOG to a temp CSV with an empty cache dir and in-memory cache."""
+    monkeypatch.setattr(product_catalog, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(product_catalog, "_memory_cache", {})
+    path = tmp_path / "product_catalog.csv"
+    CATALOG.to_csv(path, index=False)
+    return str(path)
+
+
+def sales(product_ids):
+    n = len(product_ids)
+    return pd.DataFrame({
+        "date": ["2025-11-01"] * n,
+        "region": (["North", "South"] * n)[:n],
+        "product_id": product_ids,
+        "revenue": np.arange(n, dtype="float64") * 10 + 5,
+        "cost": np.arange(n, dtype="float64") + 1,
+        "quantity": np.arange(n) % 5 + 1,
+    })
+
+
+def test_unmatched_skus_get_missing_attributes(catalog_path):
+    sales_df = sales(["P001", "P999", "P003", "P999"])
+    enriched, unmatched_rate = enrich_with_catalog(sales_df, load_catalog(catalog_path))
+
+    assert unmatched_rate == pytest.approx(0.5)
+    unmatched = enriched["product_id"].astype(str) == "P999"
+    assert enriched.loc[unmatched, "cost_price"].isna().all()
+    assert enriched.loc[unmatched, ["product_name", "category", "brand"]].isna().all().all()
+    assert isinstance(enriched["category"].dtype, pd.CategoricalDtype)
+    assert enriched.loc[~unmatched, "cost_price"].tolist() == [200.0, 80.0]
+    assert enriched.loc[~unmatched, "brand"].astype(str).tolist() == ["TechNova", "SoundMax"]
+
+
+def test_matches_pandas_left_merge(catalog_path):
+    rng = np.random.default_rng(3)
+    sales_df = sales([f"P{i:03d}" for i in rng.integers(1, 6, 500)])
+    catalog = load_catalog(catalog_path)
+
+    enriched, _ = enrich_with_catalog(sales_df, catalog)
+    expected = pd.merge(sales_df, pd.read_csv(catalog_path), on="product_id", how="left")
+
+    assert list(enriched.columns) == list(expected.columns)
+    # Compare values; enrich keeps text columns as categoricals and widens ints to float
+    actual = enriched.astype({col: object for col in ["product_id", "product_name", "category", "brand"]})
+    expected = expected.astype({"cost_price": "float64"})
+    for col in expected.columns:
+        pd.testing.assert_series_equal(actual[col], expected[col], check_dtype=False, check_names=False)
+
+
+def test_load_catalog_rereads_on_change(catalog_path):
+    first = load_catalog(catalog_path)
+    assert load_catalog(catalog_path) is first
+
+    updated = CATALOG.copy()
+    updated.loc[len(updated)] = ["P004", "Desk Chair", "Home", "ErgoFit", 120]
+    updated.to_csv(catalog_path, index=False)
+    # Bump mtime explicitly in case the rewrite lands in the same timestamp tick
+    stat = os.stat(catalog_path)
+    os.utime(catalog_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    second = load_catalog(catalog_path)
+    assert second is not first
+    assert second["product_id"].astype(str).tolist() == ["P001", "P002", "P003", "P004"]
+
+
+def test_load_catalog_uses_pickle_across_processes(catalog_path, monkeypatch):
+    first = load_catalog(catalog_path)
+    # A fresh process has an empty memory cache but finds the pickle
+    monkeypatch.setattr(product_catalog, "_memory_cache", {})
+    monkeypatch.setattr(product_catalog.pd, "read_csv", lambda *a, **k: pytest.fail("CSV re-parsed"))
+
+    pd.testing.assert_frame_equal(load_catalog(catalog_path), first)
+
+
+def test_load_catalog_ignores_unreadable_cache(catalog_path):
+    os.makedirs(product_catalog.CACHE_DIR)
+    with open(product_catalog._cache_file(catalog_path), "wb") as f:
+        f.write(b"not a pickle")
+
+    catalog = load_catalog(catalog_path)
+
+    assert catalog["product_id"].astype(str).tolist() == ["P001", "P002", "P003"]
+    # The broken cache file is replaced by a fresh one
+    product_catalog._memory_cache.clear()
+    pd.testing.assert_frame_equal(load_catalog(catalog_path), catalog)
@@ -0,0 +1,117 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import api_server
+from query_engine import DuckDBEngine, SQLiteEngine
+
+pytest.importorskip("duckdb")
+
+# Dashboard queries (dashboard/streamlit_app.py), plus integer aggregates
+KPI_QUERIES = {
+    "overall": """
+        SELECT
+            ROUND(SUM(revenue),2) AS total_revenue,
+            ROUND(SUM(profit),2) AS total_profit,
+            ROUND(AVG(margin_percent),2) AS avg_margin
+        FROM sales_aggregated;
+    """,
+    "revenue_by_region": """
+        SELECT region, SUM(revenue) AS revenue, SUM(profit) AS profit, AVG(margin_percent) AS margin
+        FROM sales_aggregated
+        GROUP BY region
+        ORDER BY revenue DESC;
+    """,
+    "top_products": """
+        SELECT product_id, SUM(revenue) AS revenue, SUM(profit) AS profit, AVG(margin_percent) AS margin
+        FROM sales_aggregated
+        GROUP BY product_id
+        ORDER BY revenue DESC
+        LIMIT 10;
+    """,
+    "daily_trend": """
+        SELECT date, SUM(revenue) AS revenue
+        FROM sales_aggregated
+        GROUP BY date
+        ORDER BY date;
+    """,
+    "quantity_by_region": """
+        SELECT region, SUM(quantity) AS quantity, COUNT(*) AS n_rows
+        FROM sales_aggregated
+        GROUP BY region
+        ORDER BY region;
+    """,
+    "transactional_count": "SELECT COUNT(*) AS cnt FROM sales_transactional",
+}
+
+API_ENDPOINTS = {
+    "revenue": lambda: api_server.get_revenue(),
+    "top_products": lambda: api_server.top_products(limit=5),
+}
+
+
+@pytest.fixture(scope="module")
+def engines(tmp_path_factory):
+    """One synthetic processed layer, loaded into SQLite and read by DuckDB."""
+    workdir = tmp_path_factory.mktemp("warehouse")
+    processed_dir = workdir / "processed"
+    processed_dir.mkdir()
+    rng = np.random.default_rng(5)
+    n = 2000
+    revenue = rng.uniform(50, 3000, n).round(2)
+    total_cost = (revenue / rng.uniform(1.1, 1.5, n)).round(2)
+    aggregated = pd.DataFrame({
+        "date": pd.date_range("2025-11-01", periods=30).strftime("%Y-%m-%d")[rng.integers(0, 30, n)],
+        "region": np.array(["North", "South", "East", "West"])[rng.integers(0, 4, n)],
+        "product_id": [f"P{i:03d}" for i in rng.integers(1, 21, n)],
+        "revenue": revenue,
+        "total_cost": total_cost,
+        "profit": revenue - total_cost,
+        "margin_percent": ((revenue - total_cost) / revenue * 100).round(2),
+        "quantity": rng.integers(1, 11, n),
+    })
+    transactional = aggregated.drop(columns=["total_cost"]).head(500)
+
+    db_path = workdir / "retail_sales.db"
+    conn = sqlite3.connect(db_path)
+    for name, df in [("sales_aggregated", aggregated), ("sales_transactional", transactional)]:
+        df.to_csv(processed_dir / f"{name}.csv", index=False)
+        df.to_sql(name, conn, index=False)
+    conn.close()
+
+    return {"sqlite": SQLiteEngine(str(db_path)), "duckdb": DuckDBEngine(str(processed_dir))}
+
+
+@pytest.mark.parametrize("query", KPI_QUERIES.values(), ids=KPI_QUERIES.keys())
+def test_kpi_queries_match_across_engines(engines, query):
+    expected = engines["sqlite"].query(query)
+    actual = engines["duckdb"].query(query)
+    assert not expected.empty
+    pd.testing.assert_frame_equal(actual, expected, check_exact=False, rtol=1e-9)
+
+
+def test_integer_sums_keep_integer_dtype(engines):
+    query = KPI_QUERIES["quantity_by_region"]
+    for engine in engines.values():
+        df = engine.query(query)
+        assert df["quantity"].dtype == np.int64
+        assert df["n_rows"].dtype == np.int64
+
+
+def test_parameters_are_bound_on_both_engines(engines):
+    query = "SELECT product_id FROM sales_aggregated GROUP BY product_id ORDER BY product_id LIMIT ?;"
+    results = [engine.query(query, [3]) for engine in engines.values()]
+    assert all(len(df) == 3 for df in results)
+    pd.testing.assert_frame_equal(results[0], results[1])
+
+
+@pytest.mark.parametrize("endpoint", API_ENDPOINTS.values(), ids=API_ENDPOINTS.keys())
+def test_api_endpoints_match_across_engines(engines, monkeypatch, endpoint):
+    responses = {}
+    for name, engine in engines.items():
+        monkeypatch.setattr(api_server, "get_engine", lambda _=None, engine=engine: engine)
+        responses[name] = endpoint()
+    assert responses["sqlite"]
+    assert responses["duckdb"] == responses["sqlite"]
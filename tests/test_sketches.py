@@ -0,0 +1,138 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import api_server
+from query_engine import SQLiteEngine
+from sketches import (
+    SKETCH_TABLE,
+    HyperLogLog,
+    TDigest,
+    build_partition_sketches,
+    hash_values,
+    merge_sketches,
+    save_sketches,
+)
+
+REGIONS = ["North", "South", "East", "West"]
+
+
+@pytest.fixture(scope="module")
+def transactions():
+    rng = np.random.default_rng(17)
+    n = 50_000
+    return pd.DataFrame({
+        "date": pd.Timestamp("2025-11-01") + pd.to_timedelta(rng.integers(0, 10, n), unit="D"),
+        "region": np.array(REGIONS, dtype=object)[rng.integers(0, len(REGIONS), n)],
+        "product_id": [f"P{i:05d}" for i in rng.integers(0, 20_000, n)],
+        "revenue": rng.lognormal(6, 0.8, n).round(2),
+        "quantity": rng.integers(1, 11, n),
+    })
+
+
+def rank_error(values, estimate, q):
+    """Distance from q to the rank interval of `estimate` (ties make it an interval)."""
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    if np.all(values == np.round(values)):
+        # Integer data: the digest interpolates between atoms, so judge the nearest one
+        estimate = np.round(estimate)
+    lo = np.searchsorted(values, estimate, side="left") / values.size
+    hi = np.searchsorted(values, estimate, side="right") / values.size
+    return 0.0 if lo <= q <= hi else min(abs(lo - q), abs(hi - q))
+
+
+def test_distinct_skus_within_error_bound(transactions):
+    sketches = build_partition_sketches(transactions)
+    for region, region_df in transactions.groupby("region"):
+        parts = sketches[(sketches["region"] == region) & (sketches["metric"] == "distinct_skus")]
+        estimate = merge_sketches("hll", parts["sketch"]).estimate()
+        exact = region_df["product_id"].nunique()
+        # ~4 standard errors at p=12
+        assert abs(estimate / exact - 1) < 0.065
+
+
+def test_basket_percentiles_within_rank_bound(transactions):
+    sketches = build_partition_sketches(transactions)
+    for region, region_df in transactions.groupby("region"):
+        parts = sketches[sketches["region"] == region]
+        for metric, column in [("basket_revenue", "revenue"), ("basket_quantity", "quantity")]:
+            digest = merge_sketches("tdigest", parts.loc[parts["metric"] == metric, "sketch"])
+            for q in (0.5, 0.95):
+                assert rank_error(region_df[column], digest.quantile(q), q) < 0.005
+
+
+def test_serialize_and_merge_round_trip():
+    rng = np.random.default_rng(3)
+    left, right = rng.normal(100, 15, 20_000), rng.normal(130, 20, 30_000)
+
+    a = HyperLogLog().add_hashes(hash_values(np.arange(0, 6000)))
+    b = HyperLogLog().add_hashes(hash_values(np.arange(4000, 10_000)))
+    restored = HyperLogLog.from_bytes(a.to_bytes())
+    np.testing.assert_array_equal(restored.registers, a.registers)
+    merged = merge_sketches("hll", [a.to_bytes(), b.to_bytes()])
+    assert merged.estimate() == HyperLogLog().add_hashes(hash_values(np.arange(0, 10_000))).estimate()
+
+    d1, d2 = TDigest.from_values(left), TDigest.from_values(right)
+    restored = TDigest.from_bytes(d1.to_bytes())
+    np.testing.assert_array_equal(restored.means, d1.means)
+    np.testing.assert_array_equal(restored.weights, d1.weights)
+    assert (restored.min, restored.max) == (d1.min, d1.max)
+
+    digest = merge_sketches("tdigest", [d1.to_bytes(), d2.to_bytes()])
+    both = np.concatenate([left, right])
+    assert digest.count == both.size
+    assert (digest.min, digest.max) == (both.min(), both.max())
+    for q in (0.5, 0.95):
+        assert rank_error(both, digest.quantile(q), q) < 0.005
+
+
+def test_merge_rejects_mismatched_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(12).merge(HyperLogLog(10))
+
+
+def test_save_sketches_merges_overlapping_partitions(transactions, tmp_path):
+    db_path = str(tmp_path / "sketches.db")
+    first = transactions[transactions["date"] <= "2025-11-06"]
+    second = transactions[transactions["date"] >= "2025-11-04"].sample(frac=0.5, random_state=1)
+
+    assert save_sketches(build_partition_sketches(first), db_path, source="a.csv")
+    assert save_sketches(build_partition_sketches(second), db_path, source="b.csv")
+    # Re-applying a source is a no-op rather than double counting
+    assert not save_sketches(build_partition_sketches(second), db_path, source="b.csv")
+
+    conn = sqlite3.connect(db_path)
+    stored = pd.read_sql_query(f"SELECT * FROM {SKETCH_TABLE}", conn)
+    conn.close()
+
+    combined = pd.concat([first, second])
+    expected_rows = combined.groupby([combined["date"].dt.strftime("%Y-%m-%d"), "region"]).size()
+    revenue = stored[stored["metric"] == "basket_revenue"].set_index(["date", "region"])["n_rows"]
+    assert revenue.sort_index().tolist() == expected_rows.sort_index().tolist()
+
+    # Partitions from both files survive, and overlapping ones hold the union
+    assert set(stored["date"]) == set(combined["date"].dt.strftime("%Y-%m-%d"))
+    day = stored[(stored["date"] == "2025-11-05") & (stored["region"] == "North")]
+    digest = TDigest.from_bytes(day.loc[day["metric"] == "basket_revenue", "sketch"].iloc[0])
+    exact = combined[(combined["date"] == "2025-11-05") & (combined["region"] == "North")]["revenue"]
+    assert digest.count == len(exact)
+    assert rank_error(exact, digest.quantile(0.5), 0.5) < 0.01
+
+
+def test_sketch_endpoints_before_first_transform(transactions, tmp_path, monkeypatch):
+    db_path = str(tmp_path / "retail_sales.db")
+    # A warehouse loaded before sketches existed: no sketch table yet
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE sales_aggregated (date TEXT, region TEXT, revenue REAL)")
+    conn.close()
+    monkeypatch.setattr(api_server, "get_engine", lambda _=None: SQLiteEngine(db_path))
+
+    assert api_server.distinct_skus() == []
+    assert api_server.distinct_skus(per_day=True) == []
+    assert api_server.basket_percentiles() == []
+
+    save_sketches(build_partition_sketches(transactions), db_path, source="a.csv")
+    assert [row["region"] for row in api_server.distinct_skus()] == sorted(REGIONS)
+    assert sum(row["baskets"] for row in api_server.basket_percentiles()) == len(transactions)